@@ -0,0 +1,73 @@
+import numpy as np
+
+# Agregasi berjendela untuk mode sampling sub-menit.
+# Setiap kanal (parameter) punya ring buffer NumPy berukuran tetap; penambahan sampel
+# hanya menulis ke buffer yang sudah dialokasikan, dan statistik jendela dihitung
+# secara vektor untuk semua kanal sekaligus.
+
+
+class WindowAggregator:
+    def __init__(self, channels, capacity):
+        """
+        Argumen:
+            channels (iterable): nama parameter
+            capacity (int): jumlah sampel maksimum per jendela
+        """
+        self.channels = tuple(channels)
+        self.capacity = int(capacity)
+        # Satu baris per kanal agar reduksi per kanal membaca memori yang berurutan
+        self.buf = np.full((len(self.channels), self.capacity), np.nan, dtype=np.float64)
+        self.pos = 0
+        self.size = 0
+
+    def add(self, record):
+        """Tambahkan satu sampel (dict parameter -> nilai, None dianggap kosong)."""
+        col = self.pos
+        buf = self.buf
+        for i, name in enumerate(self.channels):
+            value = record.get(name)
+            buf[i, col] = np.nan if value is None else value
+        self.pos = (col + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def reset(self):
+        self.pos = 0
+        self.size = 0
+
+    def summarize(self):
+        """
+        Hitung mean/min/max/stddev dan jumlah sampel valid per kanal.
+
+        Return:
+            dict: parameter -> {"mean", "min", "max", "std", "n"} (None jika tidak ada sampel)
+        """
+        data = self.buf[:, :self.size]
+        valid = ~np.isnan(data)
+        count = valid.sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            total = np.where(valid, data, 0.0).sum(axis=1)
+            mean = total / count
+            minimum = np.where(valid, data, np.inf).min(axis=1, initial=np.inf)
+            maximum = np.where(valid, data, -np.inf).max(axis=1, initial=-np.inf)
+            dev = np.where(valid, data - mean[:, None], 0.0)
+            std = np.sqrt((dev * dev).sum(axis=1) / count)
+
+        empty = count == 0
+        for arr in (mean, minimum, maximum, std):
+            arr[empty] = np.nan
+
+        result = {}
+        for i, name in enumerate(self.channels):
+            if empty[i]:
+                result[name] = {"mean": None, "min": None, "max": None, "std": None, "n": 0}
+            else:
+                result[name] = {
+                    "mean": round(float(mean[i]), 2),
+                    "min": round(float(minimum[i]), 2),
+                    "max": round(float(maximum[i]), 2),
+                    "std": round(float(std[i]), 3),
+                    "n": int(count[i]),
+                }
+        return result
@@ -1,5 +1,6 @@
-from flask import Flask, send_from_directory, jsonify, request, send_file
+from flask import Flask, send_from_directory, jsonify, request, send_file, Response
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import json
 import os
@@ -9,8 +10,13 @@ import logging
 import traceback
 import re
 import subprocess
-import mysql.connector
 from dotenv import load_dotenv
+import rollups
+from storage import get_storage
+from snapshot import SnapshotReader
+from stream import Broadcaster, STREAM_HEARTBEAT
+import downsample
+import queue
 
 # === Logging Setup ===
 log_path = "/opt/logger/log/web.log"
@@ -31,16 +37,12 @@ if not load_dotenv(dotenv_path=env_path):
     print(f"❌ env file not found at {env_path}")
     exit(1)
 
-# === MySQL Config ===
-DB_CONFIG = {
-    "host": os.getenv('DB_HOST'),
-    "database": os.getenv('DB_NAME'),
-    "user": os.getenv('DB_USER'),
-    "password": os.getenv('DB_PASSWORD'),
-    "port": int(os.getenv('DB_PORT')),
-}
-
 PORT_NUMBER_APP = int(os.getenv('PORT_NUMBER_APP', '5010'))
+# Status circuit breaker perangkat, ditulis oleh main.py setiap siklus
+HEALTH_FILE = os.getenv('HEALTH_FILE', "/opt/logger/data/device_health.json")
+# Batas titik /api/history jika klien tidak mengirim max_points (0 = tanpa batas)
+HISTORY_MAX_POINTS = int(os.getenv('HISTORY_MAX_POINTS', '0'))
+HISTORY_DOWNSAMPLE = os.getenv('HISTORY_DOWNSAMPLE', 'lttb')
 
 # === Path Setup ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -92,24 +94,18 @@ except Exception as e:
 # === Flask App ===
 app = Flask(__name__, static_folder=None)
 
+# Backend data sensor (STORAGE_BACKEND): MySQL, tsstore atau PostgreSQL
+STORAGE = get_storage()
+# Data terbaru dari shared memory yang ditulis main.py
+SNAPSHOT = SnapshotReader()
+# Satu pengamat snapshot untuk semua klien /api/stream
+BROADCAST = Broadcaster(SnapshotReader())
+
 # === USB Mount Management ===
 BASE_MOUNT_DIR = "/mnt"
 MOUNTED_USB = []
 
 
-def query_to_dataframe(query, params=None):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(query, params or ())
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    df = pd.DataFrame(rows)
-    df.fillna(value=pd.NA, inplace=True)
-    df = df.astype(object).where(pd.notnull(df), None)
-    return df
-
-
 def get_usb_devices():
     devices = []
     try:
@@ -177,6 +173,14 @@ def get_config():
     return jsonify(CONFIG)
 
 
+def snapshot_row(record, params):
+    """Record snapshot main.py dalam bentuk respons /api/latest."""
+    row = {param: record.get(param.lower()) for param in params}
+    row['date'] = datetime.strptime(record['date'], "%Y-%m-%d %H:%M:%S")
+    row['date_str'] = row['date'].strftime("%Y-%m-%d %H:%M")
+    return row
+
+
 @app.route('/api/latest')
 def latest_data():
     try:
@@ -184,22 +188,15 @@ def latest_data():
         if not params:
             return jsonify({"error": "No parameters defined in config"}), 400
 
-        param_fields = ', '.join(params + ["date"])
-        query = f"""
-                    SELECT {param_fields}
-                    FROM (
-                        SELECT {param_fields} FROM data
-                        UNION ALL
-                        SELECT {param_fields} FROM tmp
-                    ) AS combined
-                    ORDER BY date DESC LIMIT 1
-                """
-        df = query_to_dataframe(query)
+        # Snapshot segar dilayani langsung; database hanya jika snapshot basi/tidak ada
+        snap = SNAPSHOT.latest()
+        if snap is not None:
+            return jsonify(snapshot_row(snap, params))
 
-        if df.empty:
+        row = STORAGE.latest(params)
+        if row is None:
             return jsonify({param: None for param in params})
 
-        row = df.iloc[0].to_dict()
         if 'date' in row and row['date']:
             row['date_str'] = row['date'].strftime("%Y-%m-%d %H:%M")
         return jsonify(row)
@@ -209,12 +206,71 @@ def latest_data():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/api/history')
-def history_data():
-    param = request.args.get('param', 'temp')
-    range_time = request.args.get('range', 'realtime')
-    now = datetime.now()
-    start_time = {
+@app.route('/api/stream')
+def stream_data():
+    """Server-Sent Events: setiap record baru dari main.py, event id = seq snapshot."""
+    params = CONFIG.get("parameters", [])
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+    events, backlog, reset = BROADCAST.subscribe(last_id)
+
+    def format_event(seq, record):
+        row = snapshot_row(record, params)
+        row['date'] = record['date']
+        return f"id: {seq}\nevent: reading\ndata: {json.dumps(row)}\n\n"
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for seq, record in backlog:
+                yield format_event(seq, record)
+            while not events.overflow:
+                try:
+                    seq, record = events.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if events.overflow:
+                    # Ada event yang terbuang; tutup agar klien tersambung ulang dengan Last-Event-ID
+                    break
+                yield format_event(seq, record)
+        finally:
+            BROADCAST.unsubscribe(events)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+def downsample_frame(df, columns, max_points, method, step_minutes):
+    """
+    Kurangi baris df menjadi paling banyak max_points baris. Semua kolom di `columns`
+    memakai satu grid bucket bersama, jadi timestamp tetap satu kolom dan jumlah
+    baris tidak bertambah dengan jumlah parameter.
+
+    Return:
+        (DataFrame, float): baris terpilih dan step_minutes baru. Jarak antar titik hasil
+        downsampling bisa selebar satu bucket, jadi step dinaikkan agar grafik tidak
+        menganggapnya gap.
+    """
+    if not max_points or len(df) <= max_points:
+        return df, step_minutes
+    dates = pd.to_datetime(df["date"])
+    values = [df[column].tolist() for column in columns if column in df.columns]
+    keep = downsample.downsample(dates.values, values, max_points, method) if values else np.arange(0)
+    points = max_points // 2 if method == "minmax" else max_points
+    span = (dates.iloc[-1] - dates.iloc[0]).total_seconds() / 60
+    return df.iloc[keep].reset_index(drop=True), max(step_minutes, round(span / max(points, 1), 2))
+
+
+def history_start(range_time, now):
+    return {
         "realtime": now - timedelta(minutes=15),
         "1h": now - timedelta(hours=1),
         "12h": now - timedelta(hours=12),
@@ -223,70 +279,212 @@ def history_data():
         "7d": now - timedelta(days=7)
     }.get(range_time, now - timedelta(minutes=15))
 
+
+def resolve_params(names):
+    """
+    Cocokkan nama parameter dari request dengan CONFIG["parameters"] (tanpa beda huruf besar).
+    Hanya nama hasil pencocokan yang boleh masuk ke SQL sebagai nama kolom.
+
+    Return:
+        (list, list): nama parameter sesuai config, dan nama yang tidak dikenal
+    """
+    allowed = {p.strip().lower(): p.strip() for p in CONFIG.get("parameters", []) if p.strip()}
+    params, unknown = [], []
+    for name in names:
+        param = allowed.get(name.strip().lower())
+        if param is None:
+            unknown.append(name)
+        elif param not in params:
+            params.append(param)
+    return params, unknown
+
+
+def parse_since():
+    """
+    Cursor ?since= (timestamp terakhir yang sudah dimiliki klien), None jika tidak dikirim.
+    Format sama dengan isi "timestamps" / "cursor" di respons, misalnya 2025-01-01 10:05:00.
+    """
+    since = request.args.get('since')
+    if not since:
+        return None
     try:
-        query = f"""
-            SELECT date, {param}
-            FROM (
-                SELECT date, {param} FROM data
-                UNION ALL
-                SELECT date, {param} FROM tmp
-            ) AS combined
-            WHERE date >= %s
-            ORDER BY date ASC;
-        """
-        df = query_to_dataframe(query, (start_time,))
-
-        if param not in df.columns:
-            return jsonify({"timestamps": [], "values": []})
-
-        return jsonify({
-            "timestamps": df["date"].astype(str).tolist(),
-            "values": df[param].tolist()
-        })
+        return datetime.fromisoformat(since)
+    except ValueError:
+        raise ValueError(f"since tidak valid: {since}")
+
+
+def delta_start(start_time, since, resolution):
+    """
+    Batas bawah pembacaan untuk permintaan delta. Data mentah cukup dibaca sejak cursor;
+    bucket rollup yang memuat cursor belum tentu selesai, jadi bucket itu dikirim ulang
+    dan klien mengganti titik yang timestamp-nya >= timestamp pertama delta.
+    """
+    if since is None:
+        return start_time
+    return max(start_time, rollups.bucket_start(since, resolution))
+
+
+def after_cursor(df, since):
+    """Hanya baris dengan date > since (data mentah)."""
+    if since is None or df.empty or "date" not in df.columns:
+        return df
+    return df[(pd.to_datetime(df["date"]) > pd.Timestamp(since)).values].reset_index(drop=True)
+
+
+def with_cursor(result, start_time, since):
+    """Tambahkan start (awal jendela), since dan cursor baru ke respons."""
+    result["start"] = str(start_time)
+    result["since"] = None if since is None else str(since)
+    result["cursor"] = result["timestamps"][-1] if result["timestamps"] else result["since"]
+    return result
+
+
+def history_series(params, start_time, now, max_points, method, since=None):
+    """
+    Deret history beberapa parameter dari satu pembacaan penyimpanan.
+    Dengan `since`, hanya baris setelah cursor (plus bucket rollup yang sedang berjalan).
+
+    Return:
+        dict: timestamps (bersama), series {param: {values[, min, max]}}, resolution, step_minutes
+    """
+    # Rentang panjang dibaca dari agregat per jam/hari (7 hari = 168 baris, bukan 10 ribu)
+    resolution = rollups.resolution_for(start_time, now)
+    if resolution != "raw" and all(p.lower() in rollups.PARAMS for p in params):
+        try:
+            df = STORAGE.aggregate(params, delta_start(start_time, since, resolution), resolution)
+            if df is None:
+                raise LookupError(f"backend {STORAGE.name} tanpa agregasi")
+            df, step = downsample_frame(
+                df, [f"{p}:avg" for p in params], max_points, method, rollups.step_minutes(resolution)
+            )
+            empty = [None] * len(df)
+            return {
+                "timestamps": df["date"].astype(str).tolist(),
+                "series": {
+                    p: {stat: df[f"{p}:{key}"].tolist() if f"{p}:{key}" in df.columns else empty
+                        for stat, key in (("values", "avg"), ("min", "min"), ("max", "max"))}
+                    for p in params
+                },
+                "resolution": resolution,
+                "step_minutes": step
+            }
+        except Exception as e:
+            # Tabel rollup belum ada (migrasi belum jalan) atau backend tanpa agregasi: pakai data mentah
+            logging.warning("⚠️ Rollup %s tidak bisa dibaca, pakai data mentah: %s", resolution, e)
+
+    # WHERE date >= cursor memakai indeks date, jadi refresh hanya membaca baris baru
+    df = after_cursor(STORAGE.read_range(delta_start(start_time, since, "raw"), None, params), since)
+    if "date" not in df.columns:
+        return {"timestamps": [], "series": {p: {"values": []} for p in params}, "resolution": "raw", "step_minutes": 0}
+
+    df, step = downsample_frame(df, params, max_points, method, 0)
+    empty = [None] * len(df)
+    return {
+        "timestamps": df["date"].astype(str).tolist(),
+        "series": {p: {"values": df[p].tolist() if p in df.columns else empty} for p in params},
+        "resolution": "raw",
+        "step_minutes": step
+    }
+
+
+def downsample_args():
+    """
+    max_points: jumlah titik maksimal (biasanya lebar grafik dalam piksel), payload tetap kecil
+    berapa pun panjang rentangnya. downsample: lttb (bentuk kurva) atau minmax (puncak per bucket).
+    """
+    max_points = request.args.get('max_points', HISTORY_MAX_POINTS, type=int)
+    method = request.args.get('downsample', HISTORY_DOWNSAMPLE)
+    if method not in downsample.METHODS:
+        raise ValueError(f"downsample harus salah satu dari {', '.join(downsample.METHODS)}")
+    return max_points, method
+
+
+@app.route('/api/history')
+def history_data():
+    params, unknown = resolve_params([request.args.get('param', 'temp')])
+    if unknown:
+        return jsonify({"timestamps": [], "values": [], "error": f"Parameter tidak dikenal: {unknown[0]}"}), 400
+    param = params[0]
+    try:
+        max_points, method = downsample_args()
+        since = parse_since()
+    except ValueError as e:
+        return jsonify({"timestamps": [], "values": [], "error": str(e)}), 400
+    now = datetime.now()
+    start_time = history_start(request.args.get('range', 'realtime'), now)
+
+    try:
+        result = with_cursor(history_series([param], start_time, now, max_points, method, since), start_time, since)
+        series = result.pop("series")[param]
+        return jsonify(dict(result, **series))
     except Exception as e:
         print(f"❌ /api/history error: {e}")
         return jsonify({"timestamps": [], "values": [], "error": str(e)}), 500
 
 
+@app.route('/api/history/batch')
+def history_batch():
+    """
+    History semua grafik dashboard dalam satu request dan satu pembacaan penyimpanan.
+    ?params=temp,hum,rain (default semua CONFIG["parameters"]), range, max_points, downsample,
+    since (cursor dari respons sebelumnya: hanya data baru).
+    """
+    names = [n for n in request.args.get('params', '').split(',') if n.strip()]
+    params, unknown = resolve_params(names or CONFIG.get("parameters", []))
+    if unknown:
+        return jsonify({"error": f"Parameter tidak dikenal: {', '.join(unknown)}"}), 400
+    if not params:
+        return jsonify({"error": "No parameters defined in config"}), 400
+    try:
+        max_points, method = downsample_args()
+        since = parse_since()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    now = datetime.now()
+    start_time = history_start(request.args.get('range', 'realtime'), now)
+
+    try:
+        return jsonify(with_cursor(history_series(params, start_time, now, max_points, method, since), start_time, since))
+    except Exception as e:
+        print(f"❌ /api/history/batch error: {e}")
+        return jsonify({"timestamps": [], "series": {}, "error": str(e)}), 500
+
+
 @app.route('/api/windrose')
 def windrose_data():
-    range_time = request.args.get('range', 'realtime')
+    try:
+        since = parse_since()
+    except ValueError as e:
+        return jsonify({"timestamps": [], "wspeed": [], "wdir": [], "error": str(e)}), 400
     now = datetime.now()
-    start_time = {
-        "realtime": now - timedelta(minutes=15),
-        "1h": now - timedelta(hours=1),
-        "12h": now - timedelta(hours=12),
-        "1d": now - timedelta(days=1),
-        "3d": now - timedelta(days=3),
-        "7d": now - timedelta(days=7)
-    }.get(range_time, now - timedelta(minutes=15))
+    start_time = history_start(request.args.get('range', 'realtime'), now)
 
     try:
-        
-        query = f"""
-            SELECT date, wspeed, wdir
-            FROM (
-                SELECT date,  wspeed, wdir FROM data
-                UNION ALL
-                SELECT date,  wspeed, wdir FROM tmp
-            ) AS combined
-            WHERE date >= %s
-            ORDER BY date ASC;
-        """
-        df = query_to_dataframe(query, (start_time,))
+        df = None
+        resolution = rollups.resolution_for(start_time, now)
+        if resolution != "raw":
+            try:
+                # Arah dari agregat adalah rata-rata vektor per bucket
+                df = STORAGE.wind_aggregate(delta_start(start_time, since, resolution), resolution)
+            except Exception as e:
+                logging.warning("⚠️ Rollup %s tidak bisa dibaca, pakai data mentah: %s", resolution, e)
+        if df is None:
+            resolution = "raw"
+            df = after_cursor(STORAGE.read_range(delta_start(start_time, since, "raw"), None, ["wspeed", "wdir"]), since)
 
         # Ganti NaN dengan None agar JSON valid
         df.fillna(value=pd.NA, inplace=True)
         df = df.astype(object).where(pd.notnull(df), None)
 
         if "wspeed" not in df.columns or "wdir" not in df.columns:
-            return jsonify({"timestamps": [], "wspeed": [], "wdir": []})
+            return jsonify(with_cursor({"timestamps": [], "wspeed": [], "wdir": [], "resolution": resolution}, start_time, since))
 
-        return jsonify({
+        return jsonify(with_cursor({
             "timestamps": df["date"].astype(str).tolist(),
             "wspeed": df["wspeed"].tolist(),
-            "wdir": df["wdir"].tolist()
-        })
+            "wdir": df["wdir"].tolist(),
+            "resolution": resolution
+        }, start_time, since))
 
     except Exception as e:
         logging.error("❌ /api/windrose error: %s", e)
@@ -294,6 +492,18 @@ def windrose_data():
         return jsonify({"timestamps": [], "wspeed": [], "wdir": [], "error": str(e)}), 500
 
 
+@app.route('/api/device-health')
+def device_health():
+    try:
+        with open(HEALTH_FILE, "r") as f:
+            return jsonify(json.load(f))
+    except FileNotFoundError:
+        return jsonify({"updated": None, "devices": {}})
+    except Exception as e:
+        logging.error("❌ /api/device-health error: %s", e)
+        return jsonify({"updated": None, "devices": {}, "error": str(e)}), 500
+
+
 
 
 
@@ -326,15 +536,8 @@ def export_data():
         start_dt = datetime.fromisoformat(start)
         end_dt = datetime.fromisoformat(end)
 
-        query = """
-            SELECT * FROM (
-                SELECT * FROM data
-                UNION ALL
-                SELECT * FROM tmp
-            ) AS combined
-            WHERE date BETWEEN %s AND %s ORDER BY date ASC;
-        """
-        df = query_to_dataframe(query, (start_dt, end_dt))
+        # Data sebelum jendela MySQL diambil dari arsip (tanpa kolom id, keterangan, dateterkirim dan has)
+        df = STORAGE.read_range(start_dt, end_dt)
 
         if df.empty:
             return jsonify({"error": "Tidak ada data dalam rentang waktu tersebut."}), 400
@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from db import connection
+from partitions import RETENTION_MONTHS, add_months, month_start
+from rollups import PARAMS
+
+# Arsip dingin bulanan untuk data yang sudah keluar dari MySQL.
+#
+# Setiap bulan yang sudah selesai diekspor ke satu file NumPy terkompresi
+# (ARCHIVE_DIR/YYYY-MM.npz) dengan satu array per kolom, sehingga membaca satu
+# parameter hanya mendekompresi kolom date dan kolom parameter itu. index.json mencatat
+# per bulan: file, jumlah baris, rentang waktu dan parameter yang berisi data.
+#
+# Data sebelum hot_start() (batas retensi MySQL) dibaca dari arsip oleh /api/history
+# dan /api/export; partisi MySQL hanya dihapus setelah bulannya berhasil diarsipkan.
+#
+# Pemakaian:
+#   python archive.py                 # arsipkan semua bulan selesai yang belum/berubah
+#   python archive.py --month 2024-05 # arsipkan ulang satu bulan
+
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', "/opt/logger/database/archive")
+INDEX_FILE = "index.json"
+
+TEXT_COLUMNS = ('device', 'status', 'stats')
+INT_COLUMNS = ('datetime', 'samples')
+COLUMNS = ('device', 'date', 'datetime') + PARAMS + ('samples', 'status', 'stats')
+
+
+def hot_start():
+    """Awal jendela data di MySQL; data sebelum ini dibaca dari arsip."""
+    return add_months(month_start(datetime.now()), -RETENTION_MONTHS)
+
+
+def load_index():
+    path = os.path.join(ARCHIVE_DIR, INDEX_FILE)
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"months": {}}
+
+
+def save_index(index):
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(ARCHIVE_DIR, INDEX_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def to_arrays(rows):
+    """Ubah baris (tuple sesuai COLUMNS) menjadi dict nama kolom -> array NumPy."""
+    columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+    arrays = {}
+    for name, values in zip(COLUMNS, columns):
+        if name == 'date':
+            arrays[name] = np.array(values, dtype='datetime64[s]')
+        elif name in TEXT_COLUMNS:
+            arrays[name] = np.array(["" if v is None else str(v) for v in values], dtype=str)
+        elif name in INT_COLUMNS:
+            arrays[name] = np.array([v or 0 for v in values], dtype=np.int64)
+        else:
+            # Kolom sensor bertipe FLOAT di MySQL, float32 tidak kehilangan presisi
+            arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+    return arrays
+
+
+def archive_month(cursor, month, index=None):
+    """
+    Ekspor satu bulan tabel data ke ARCHIVE_DIR/YYYY-MM.npz dan catat di index.
+
+    Return:
+        int: jumlah baris yang diarsipkan
+    """
+    index = index if index is not None else load_index()
+    key = f"{month:%Y-%m}"
+    cursor.execute(
+        f"SELECT {', '.join(f'`{c}`' for c in COLUMNS)} FROM data WHERE `date` >= %s AND `date` < %s ORDER BY `date`",
+        (month, add_months(month, 1))
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return 0
+
+    arrays = to_arrays(rows)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    filename = f"{key}.npz"
+    tmp = os.path.join(ARCHIVE_DIR, f".{key}.tmp.npz")
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, os.path.join(ARCHIVE_DIR, filename))
+
+    index["months"][key] = {
+        "file": filename,
+        "rows": len(rows),
+        "start": str(arrays['date'][0]).replace("T", " "),
+        "end": str(arrays['date'][-1]).replace("T", " "),
+        "params": [p for p in PARAMS if not np.isnan(arrays[p]).all()],
+        "archived_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    save_index(index)
+    print(f"[ARSIP] 📦 {key}: {len(rows)} baris -> {filename}")
+    return len(rows)
+
+
+def archive_closed_months(cursor):
+    """
+    Arsipkan setiap bulan yang sudah selesai dan belum ada di arsip, atau yang jumlah
+    barisnya berubah (misalnya data spool yang terlambat masuk).
+
+    Return:
+        list: bulan (YYYY-MM) yang diarsipkan
+    """
+    index = load_index()
+    cursor.execute(
+        "SELECT DATE_FORMAT(`date`, %s) AS m, COUNT(*) FROM data WHERE `date` < %s GROUP BY m ORDER BY m",
+        ("%Y-%m", month_start(datetime.now()))
+    )
+    archived = []
+    for key, count in cursor.fetchall():
+        entry = index["months"].get(key)
+        if entry and entry["rows"] >= count:
+            continue
+        archive_month(cursor, datetime.strptime(key, "%Y-%m"), index)
+        archived.append(key)
+    return archived
+
+
+def read_range(start, end, columns=None):
+    """
+    Baca data arsip dengan start <= date < end sebagai DataFrame.
+
+    Argumen:
+        columns (list): kolom selain date yang dibaca (default semua)
+    """
+    columns = [c.lower() for c in (columns or COLUMNS) if c.lower() != 'date']
+    lo, hi = np.datetime64(start, 's'), np.datetime64(end, 's')
+    frames = []
+    for key, entry in sorted(load_index()["months"].items()):
+        if np.datetime64(entry["end"], 's') < lo or np.datetime64(entry["start"], 's') >= hi:
+            continue
+        with np.load(os.path.join(ARCHIVE_DIR, entry["file"])) as npz:
+            dates = npz['date']
+            mask = (dates >= lo) & (dates < hi)
+            if not mask.any():
+                continue
+            frame = {'date': pd.to_datetime(dates[mask])}
+            for c in columns:
+                if c not in npz.files:
+                    continue
+                values = npz[c][mask]
+                if values.dtype == np.float32:
+                    # Lewat repr terpendek float32 agar 7.1 tidak menjadi 7.099999904632568
+                    values = values.astype(str).astype(np.float64)
+                frame[c] = values
+            frames.append(pd.DataFrame(frame))
+
+    if not frames:
+        return pd.DataFrame(columns=['date'] + columns)
+    df = pd.concat(frames, ignore_index=True)
+    return df.astype(object).where(pd.notnull(df), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arsip bulanan tabel data ke file NumPy terkompresi.")
+    parser.add_argument("--month", help="Arsipkan ulang satu bulan (YYYY-MM)")
+    args = parser.parse_args()
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        if args.month:
+            archive_month(cursor, datetime.strptime(args.month, "%Y-%m"))
+        else:
+            archived = archive_closed_months(cursor)
+            print(f"[ARSIP] ✅ {len(archived)} bulan diarsipkan.")
+        cursor.close()
+
+
+if __name__ == "__main__":
+    main()
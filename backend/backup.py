@@ -5,9 +5,11 @@ import logging
 import time
 import json
 from datetime import datetime, timedelta
-import mysql.connector
 from mysql.connector import Error
 from dotenv import load_dotenv
+from db import MYSQL_CONFIG, connection
+from partitions import RETENTION_MONTHS, is_partitioned, ensure_partitions, drop_expired
+from archive import archive_closed_months
 import pytz
 
 # === Load environment variables ===
@@ -20,28 +22,12 @@ if not load_dotenv(dotenv_path=env_path):
 BACKUP_DIR = "/opt/logger/database/backup"
 STATE_FILE = "/opt/logger/database/backup_state.json"
 
-# === Konfigurasi MySQL ===
-HOST = os.getenv('DB_HOST')
-USER = os.getenv('DB_USER')
-PASSWORD = os.getenv('DB_PASSWORD')
-DATABASE = os.getenv('DB_NAME')
-PORT = os.getenv('DB_PORT')
-
 # Timezone dan koneksi
 TIMEZONE = os.getenv('TIMEZONE')
 tz = pytz.timezone(TIMEZONE)
 ambilDate = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
 
 
-# MySQL connection configuration
-MYSQL_CONFIG = {
-    'host': HOST,
-    'user': USER,
-    'password': PASSWORD,
-    'database': DATABASE,
-    'port': PORT
-}
-
 # === Setup Logging ===
 os.makedirs(BACKUP_DIR, exist_ok=True)
 
@@ -107,20 +93,31 @@ def cleanup_old_backups():
             except Exception as e:
                 print(f"[{ambilDate}] ⚠️ Tidak bisa memproses backup: {fname} => {e}")
 
-# === Optimasi Database (hapus >13 bulan) ===
+# === Optimasi Database (arsipkan, lalu hapus >13 bulan) ===
 def optimize_database():
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
-        cur = conn.cursor()
-        cutoff = (datetime.now() - timedelta(days=396)).strftime('%Y-%m-%d %H:%M:%S')
-
-        cur.execute("DELETE FROM data WHERE date < %s", (cutoff,))
-        deleted = cur.rowcount
-        print(f"[{ambilDate}] 🧹 Menghapus {deleted} baris data lebih dari 13 bulan.")
-
-        conn.commit()
-        cur.close()
-        conn.close()
+        with connection() as conn:
+            cur = conn.cursor()
+            # Bulan yang sudah selesai diarsipkan dulu; jika gagal, tidak ada data yang dihapus
+            try:
+                archived = archive_closed_months(cur)
+                print(f"[{ambilDate}] 📦 {len(archived)} bulan diarsipkan.")
+            except Exception as e:
+                print(f"[{ambilDate}] ❌ Gagal mengarsipkan data, retensi dilewati: {e}")
+                cur.close()
+                return
+            if is_partitioned(cur):
+                # Retensi per bulan: partisi kedaluwarsa dihapus utuh, tanpa DELETE per baris
+                ensure_partitions(cur)
+                dropped = drop_expired(cur)
+                print(f"[{ambilDate}] 🧹 {len(dropped)} partisi lebih dari {RETENTION_MONTHS} bulan dihapus.")
+            else:
+                cutoff = (datetime.now() - timedelta(days=396)).strftime('%Y-%m-%d %H:%M:%S')
+                cur.execute("DELETE FROM data WHERE date < %s", (cutoff,))
+                deleted = cur.rowcount
+                print(f"[{ambilDate}] 🧹 Menghapus {deleted} baris data lebih dari 13 bulan.")
+                conn.commit()
+            cur.close()
         print("✅ Database dioptimasi (tanpa VACUUM untuk MySQL).")
     except Error as e:
         print(f"[{ambilDate}] ❌ Gagal optimasi database: {e}")
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from simulator import Simulator, FaultModel, DEVICE_MAP_PATH
+
+# Benchmark akuisisi end-to-end tanpa hardware.
+#
+# Menjalankan simulator (pty + Modbus TCP), mengarahkan semua sensor ke simulator lewat
+# variabel env, lalu menjalankan siklus pembacaan main.py yang sebenarnya (acquire())
+# sebanyak N kali. Hasil: persentil waktu siklus, jumlah retry, dan byte di jalur.
+#
+# Contoh:
+#   python bench.py --cycles 50 --latency 0.02 --jitter 0.01 --drop 0.02 --json bench.json
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 4) if values else None
+
+
+def run(cycles, faults, device_map=DEVICE_MAP_PATH, deadline=None):
+    sim = Simulator(device_map, faults)
+    sim.start()
+
+    # Nilai env proses tidak ditimpa oleh load_dotenv, jadi modul service membaca port simulator
+    os.environ.update(sim.env)
+    os.environ["ARG314_STATUS"] = "inactive"
+    os.environ.setdefault("HEALTH_FILE", os.path.join(tempfile.gettempdir(), "bench_device_health.json"))
+
+    import driver
+    import main as service
+
+    # Hitung transaksi dan kegagalan (= retry) tanpa mengubah perilaku driver
+    stats = {"transactions": 0, "errors": 0}
+    transact = driver.transact
+
+    def counted_transact(*args, **kwargs):
+        stats["transactions"] += 1
+        try:
+            return transact(*args, **kwargs)
+        except driver.ModbusError:
+            stats["errors"] += 1
+            raise
+
+    driver.transact = counted_transact
+
+    deadline = deadline or service.CYCLE_DEADLINE
+    buses = service.build_buses(service.ambilDate(), gpio=False)
+    executor = ThreadPoolExecutor(max_workers=max(len(buses), 1), thread_name_prefix="bus")
+    pending = {}
+
+    durations = []
+    complete = 0
+    try:
+        for i in range(cycles):
+            started = time.monotonic()
+            record, status_filter = service.acquire(executor, pending, service.ambilDate(), deadline, gpio=False)
+            durations.append(time.monotonic() - started)
+            complete += status_filter
+    finally:
+        executor.shutdown(wait=True)
+        sim.stop()
+
+    wire = sim.counters()
+    total_rx = sum(s["bytes_rx"] for s in wire.values())
+    total_tx = sum(s["bytes_tx"] for s in wire.values())
+    return {
+        "cycles": cycles,
+        "complete_cycles": complete,
+        "buses": list(buses),
+        "faults": {"latency": faults.latency, "jitter": faults.jitter, "drop": faults.drop, "corrupt": faults.corrupt},
+        "cycle_time": {
+            "mean": round(float(np.mean(durations)), 4) if durations else None,
+            "p50": percentile(durations, 50),
+            "p90": percentile(durations, 90),
+            "p99": percentile(durations, 99),
+            "max": round(max(durations), 4) if durations else None,
+        },
+        "rtu_transactions": stats["transactions"],
+        "rtu_retries": stats["errors"],
+        "bytes_per_cycle": round((total_rx + total_tx) / cycles, 1) if cycles else None,
+        "wire": wire,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark siklus akuisisi main.py dengan simulator Modbus.")
+    parser.add_argument("--cycles", type=int, default=20, help="Jumlah siklus pembacaan")
+    parser.add_argument("--devices", default=DEVICE_MAP_PATH, help="File peta register (devices.json)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Waktu respons perangkat (detik)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variasi acak waktu respons (+/- detik)")
+    parser.add_argument("--drop", type=float, default=0.0, help="Peluang respons tidak dikirim (0-1)")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="Peluang respons rusak / CRC salah (0-1)")
+    parser.add_argument("--deadline", type=float, default=None, help="Batas waktu per siklus (default CYCLE_DEADLINE)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="Simpan hasil ke file JSON (untuk perbandingan regresi)")
+    args = parser.parse_args()
+
+    faults = FaultModel(args.latency, args.jitter, args.drop, args.corrupt, args.seed)
+    result = run(args.cycles, faults, args.devices, args.deadline)
+
+    ct = result["cycle_time"]
+    print("\n=== HASIL BENCHMARK ===")
+    print(f"→ Siklus          : {result['cycles']} ({result['complete_cycles']} lengkap)")
+    print(f"→ Waktu siklus (s): mean {ct['mean']}, p50 {ct['p50']}, p90 {ct['p90']}, p99 {ct['p99']}, max {ct['max']}")
+    print(f"→ Transaksi RTU   : {result['rtu_transactions']} (retry {result['rtu_retries']})")
+    print(f"→ Byte per siklus : {result['bytes_per_cycle']}")
+    for name, stats in result["wire"].items():
+        print(f"   {name:<14} req {stats['requests']:>5}  resp {stats['responses']:>5}  drop {stats['dropped']:>4}  "
+              f"rusak {stats['corrupted']:>4}  rx {stats['bytes_rx']:>7}  tx {stats['bytes_tx']:>7}")
+    print("=======================")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[INFO] Hasil disimpan ke {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
-import mysql.connector
+import json
 from dotenv import load_dotenv
 import os
 import pytz
 import time
 from datetime import datetime
+from db import connection
+from migrations import migrate
+from partitions import maintain as maintain_partitions
+import rollups
+from spool import Spool, SPOOL_DIR
+from storage import STORAGE_BACKEND, get_storage
 
 
 # Load environment variables
@@ -13,22 +19,11 @@ if not load_dotenv(dotenv_path=env_path):
     exit(1)
 
 
-HOST = os.getenv('DB_HOST')
-USER = os.getenv('DB_USER')
-PASSWORD = os.getenv('DB_PASSWORD')
-DATABASE = os.getenv('DB_NAME')
-PORT = os.getenv('DB_PORT')
 TIMEZONE = os.getenv('TIMEZONE')
 DEVICE = os.getenv('DEVICE_ID','TestDevice')
 
-# MySQL connection configuration
-MYSQL_CONFIG = {
-    'host': HOST,
-    'user': USER,
-    'password': PASSWORD,
-    'database': DATABASE,
-    'port': PORT
-}
+# True setelah cekTable() berhasil sekali di proses ini
+schema_ready = False
 
 # Timezone configuration
 tz = pytz.timezone(TIMEZONE)
@@ -44,116 +39,162 @@ def ambilDateTime():
     Interval_Timestamp = datetime.strptime(ambilDateAll(), '%Y-%m-%d %H:%M:%S')
     unix_dt = int(time.mktime(Interval_Timestamp.timetuple()))
     return unix_dt
+
+def ambilDateTick(tick):
+    """Format waktu tick terjadwal seperti ambilDate() dan ambilDateTime()."""
+    date = tick.strftime("%Y-%m-%d %H:%M:%S")
+    unix_dt = int(time.mktime(tick.replace(tzinfo=None).timetuple()))
+    return date, unix_dt
       
 def cekTable():
+    """Buat / lengkapi tabel. Dipanggil sekali saat service start. Return True jika berhasil."""
+    global schema_ready
+    if STORAGE_BACKEND != "mysql":
+        # tsstore / PostgreSQL mengelola skemanya sendiri
+        try:
+            schema_ready = get_storage(writable=True).ensure_schema()
+            return schema_ready
+        except Exception as e:
+            print(f"[{datetime.now()}] Error pada koneksi database: {e}")
+            return False
     try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
-        cursor = conn.cursor()
-        # Buat tabel jika belum ada
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS data (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                device TEXT,
-                `date` DATETIME,
-                datetime BIGINT DEFAULT 0,
-                pH FLOAT DEFAULT 0,
-                orp FLOAT DEFAULT 0,
-                tds FLOAT DEFAULT 0,
-                conduct FLOAT DEFAULT 0,
-                do FLOAT DEFAULT 0,
-                salinity FLOAT DEFAULT 0,
-                nh3n FLOAT DEFAULT 0,
-                battery FLOAT DEFAULT 0,
-                depth FLOAT DEFAULT 0,
-                flow FLOAT DEFAULT 0,
-                tflow FLOAT DEFAULT 0,
-                turb FLOAT DEFAULT 0,
-                tss FLOAT DEFAULT 0,
-                cod FLOAT DEFAULT 0,
-                bod FLOAT DEFAULT 0,
-                no3 FLOAT DEFAULT 0,
-                temp FLOAT DEFAULT 0,
-                press FLOAT DEFAULT 0,
-                hum FLOAT DEFAULT 0,
-                wspeed FLOAT DEFAULT 0,
-                wdir FLOAT DEFAULT 0,
-                rain FLOAT DEFAULT 0,
-                srad FLOAT DEFAULT 0,
-                status TEXT,
-                keterangan TEXT,
-                dateterkirim DATETIME,
-                has INT DEFAULT 0 
-            )
-        ''')
-        conn.commit()
+        with connection() as conn:
+            cursor = conn.cursor()
+            # Satu tabel untuk semua data sensor. Status pengiriman KLHK ada di kolom status
+            # (NULL = belum dikirim, 'terkirim', 'retry', 'Duplikasi'), pengiriman HAS di kolom has.
+            # Tabel tmp versi lama digabung ke sini oleh migrasi 005.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS data (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    device TEXT,
+                    `date` DATETIME,
+                    datetime BIGINT DEFAULT 0,
+                    pH FLOAT DEFAULT 0,
+                    orp FLOAT DEFAULT 0,
+                    tds FLOAT DEFAULT 0,
+                    conduct FLOAT DEFAULT 0,
+                    do FLOAT DEFAULT 0,
+                    salinity FLOAT DEFAULT 0,
+                    nh3n FLOAT DEFAULT 0,
+                    battery FLOAT DEFAULT 0,
+                    depth FLOAT DEFAULT 0,
+                    flow FLOAT DEFAULT 0,
+                    tflow FLOAT DEFAULT 0,
+                    turb FLOAT DEFAULT 0,
+                    tss FLOAT DEFAULT 0,
+                    cod FLOAT DEFAULT 0,
+                    bod FLOAT DEFAULT 0,
+                    no3 FLOAT DEFAULT 0,
+                    temp FLOAT DEFAULT 0,
+                    press FLOAT DEFAULT 0,
+                    hum FLOAT DEFAULT 0,
+                    wspeed FLOAT DEFAULT 0,
+                    wdir FLOAT DEFAULT 0,
+                    rain FLOAT DEFAULT 0,
+                    srad FLOAT DEFAULT 0,
+                    status TEXT,
+                    keterangan TEXT,
+                    dateterkirim DATETIME,
+                    has INT DEFAULT 0,
+                    samples INT DEFAULT 0,
+                    stats TEXT
+                )
+            ''')
+            conn.commit()
+
+            # Tabel lama: tambahkan kolom agregasi jendela (mode SAMPLE_INTERVAL)
+            for column, definition in (("samples", "INT DEFAULT 0"), ("stats", "TEXT")):
+                cursor.execute('''
+                    SELECT COUNT(*) FROM information_schema.columns
+                    WHERE table_schema = DATABASE() AND table_name = 'data' AND column_name = %s
+                ''', (column,))
+                if cursor.fetchone()[0] == 0:
+                    cursor.execute(f"ALTER TABLE data ADD COLUMN {column} {definition}")
+            conn.commit()
+            cursor.close()
+
+        # Index dan perubahan tipe kolom dikelola sebagai migrasi berversi
+        migrate()
+        # Pastikan partisi bulan berjalan dan beberapa bulan ke depan sudah ada
+        maintain_partitions(drop=False)
+        schema_ready = True
+        return True
 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tmp (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                device TEXT,
-                `date` DATETIME,
-                datetime BIGINT DEFAULT 0,
-                pH FLOAT DEFAULT 0,
-                orp FLOAT DEFAULT 0,
-                tds FLOAT DEFAULT 0,
-                conduct FLOAT DEFAULT 0,
-                do FLOAT DEFAULT 0,
-                salinity FLOAT DEFAULT 0,
-                nh3n FLOAT DEFAULT 0,
-                battery FLOAT DEFAULT 0,
-                depth FLOAT DEFAULT 0,
-                flow FLOAT DEFAULT 0,
-                tflow FLOAT DEFAULT 0,
-                turb FLOAT DEFAULT 0,
-                tss FLOAT DEFAULT 0,
-                cod FLOAT DEFAULT 0,
-                bod FLOAT DEFAULT 0,
-                no3 FLOAT DEFAULT 0,
-                temp FLOAT DEFAULT 0,
-                press FLOAT DEFAULT 0,
-                hum FLOAT DEFAULT 0,
-                wspeed FLOAT DEFAULT 0,
-                wdir FLOAT DEFAULT 0,
-                rain FLOAT DEFAULT 0,
-                srad FLOAT DEFAULT 0,
-                status TEXT,
-                keterangan TEXT,
-                dateterkirim DATETIME,
-                has INT DEFAULT 0 
-            )
-        ''')
-        conn.commit()
-        
     except Exception as e:
         print(f"[{datetime.now()}] Error pada koneksi database: {e}")
-        return    
-
-def insert_data(date,  datetime, ph, orp, tds, conduct, do, salinity, nh3n, battery, depth, flow, tflow, turb, tss, cod, bod, no3, temp, press, hum, wspeed, wdir, rain, srad):
-    
-    device = DEVICE
-    cekTable()        
-    query = """
-        INSERT INTO tmp (device, date, datetime, ph, orp, tds, conduct, do, salinity, nh3n, battery, depth, flow, tflow, turb, tss, cod, bod, no3, temp, press, hum, wspeed, wdir, rain, srad)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,  %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-        """
-        
-    try:
-        conn = mysql.connector.connect(**MYSQL_CONFIG)
+        return False
+
+COLUMNS = (
+    'device', 'date', 'datetime',
+    'ph', 'orp', 'tds', 'conduct', 'do', 'salinity', 'nh3n', 'battery', 'depth', 'flow', 'tflow',
+    'turb', 'tss', 'cod', 'bod', 'no3', 'temp', 'press', 'hum', 'wspeed', 'wdir', 'rain', 'srad',
+    'samples', 'stats',
+)
+INSERT_QUERY = f"INSERT INTO data ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+
+
+def write_rows(rows):
+    """
+    Tulis banyak baris ke tabel data dengan satu executemany (dipanggil oleh flusher spool).
+    Baris dengan (device, date) yang sudah ada dilewati, sehingga segmen
+    spool yang terkirim ulang setelah crash tidak menimbulkan duplikasi.
+    Rollup per jam/hari diperbarui di transaksi yang sama.
+    """
+    if not schema_ready and not cekTable():
+        raise RuntimeError("skema database belum siap")
+
+    dates = [row[1] for row in rows]
+    with connection() as conn:
         cursor = conn.cursor()
+        cursor.execute(
+            "SELECT device, date FROM data WHERE date BETWEEN %s AND %s",
+            (min(dates), max(dates))
+        )
+        seen = {(device, str(date)) for device, date in cursor.fetchall()}
+
+        fresh = []
+        for row in rows:
+            key = (row[0], row[1])
+            if key in seen:
+                continue
+            seen.add(key)
+            fresh.append(tuple(row))
 
-        values = (
-                device,
-                date, datetime,
-                ph, orp, tds, conduct, do, salinity, nh3n, battery, depth, flow, tflow, turb, tss, cod, bod, no3, temp, press, hum, wspeed, wdir, rain, srad
-            )
-            #values = tuple("NULL" if v is None else v for v in values) # ganti jika None menjadi 0
-        cursor.execute(query, values)
+        if fresh:
+            cursor.executemany(INSERT_QUERY, fresh)
+            rollups.update(cursor, [dict(zip(COLUMNS, row)) for row in fresh])
         conn.commit()
+        cursor.close()
+
+    skipped = len(rows) - len(fresh)
+    print(f"[SPOOL] ✅ {len(fresh)} baris masuk database" + (f", {skipped} duplikat dilewati." if skipped else "."))
+
+
+def write_rows_storage(rows):
+    """Sink spool untuk STORAGE_BACKEND selain mysql (tsstore, postgres)."""
+    if not schema_ready and not cekTable():
+        raise RuntimeError("skema database belum siap")
+    get_storage(writable=True).write_rows([dict(zip(COLUMNS, row)) for row in rows])
 
-        print(f"[INFO] Data berhasil dimasukkan: {values}")
+
+# Semua data sensor lewat spool lokal dulu; flusher dijalankan oleh main.py
+SPOOL = Spool(SPOOL_DIR, write_rows if STORAGE_BACKEND == "mysql" else write_rows_storage)
+
+
+def insert_data(date,  datetime, ph, orp, tds, conduct, do, salinity, nh3n, battery, depth, flow, tflow, turb, tss, cod, bod, no3, temp, press, hum, wspeed, wdir, rain, srad, samples=0, stats=None):
+    """
+    Simpan satu baris data sensor (ke spool lokal, lalu ke tabel data oleh flusher).
+    samples/stats diisi pada mode agregasi: jumlah sampel jendela dan
+    statistik per parameter (min/max/std/n) yang disimpan sebagai JSON.
+    """
+    values = (
+            DEVICE,
+            date, datetime,
+            ph, orp, tds, conduct, do, salinity, nh3n, battery, depth, flow, tflow, turb, tss, cod, bod, no3, temp, press, hum, wspeed, wdir, rain, srad,
+            samples, json.dumps(stats) if stats else None
+        )
+    try:
+        SPOOL.append(values)
+        print(f"[INFO] Data masuk spool: {values}")
     except Exception as e:
-        print(f"[ERROR] Gagal memasukkan data ke database: {e}")
-    finally:
-        # Tutup koneksi
-        if 'cursor' in locals(): cursor.close()
-        if 'conn' in locals(): conn.close()
+        print(f"[ERROR] Gagal menulis data ke spool: {e}")
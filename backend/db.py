@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import mysql.connector
+from mysql.connector import errors, pooling
+from dotenv import load_dotenv
+
+# Pool koneksi MySQL bersama untuk semua service (sensor, web, backup, KLHK, HAS).
+# Koneksi dibuka sekali per proses lalu dipakai ulang; sebelum dipinjam, pool mengecek
+# koneksi (ping) dan menyambung ulang jika MySQL sempat restart.
+
+# Load environment variables
+env_path = "/opt/logger/config/env"  # env file path
+if not load_dotenv(dotenv_path=env_path):
+    print(f"Error: env file not found at {env_path}")
+    exit(1)
+
+MYSQL_CONFIG = {
+    'host': os.getenv('DB_HOST'),
+    'user': os.getenv('DB_USER'),
+    'password': os.getenv('DB_PASSWORD'),
+    'database': os.getenv('DB_NAME'),
+    'port': int(os.getenv('DB_PORT', '3306')),
+}
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))   # Tunggu koneksi bebas (detik)
+
+# Error yang berarti koneksi putus, bukan query yang salah
+CONNECTION_ERRORS = (errors.OperationalError, errors.InterfaceError)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Buat pool saat pertama kali dibutuhkan (MySQL mungkin belum siap saat service start)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(
+                pool_name=f"logger_{os.getpid()}",
+                pool_size=POOL_SIZE,
+                pool_reset_session=False,
+                **MYSQL_CONFIG
+            )
+        return _pool
+
+
+def get_connection(timeout=POOL_TIMEOUT):
+    """
+    Pinjam satu koneksi dari pool. Panggil conn.close() untuk mengembalikannya.
+
+    Raise:
+        mysql.connector.Error: jika MySQL tidak bisa dihubungi atau pool penuh
+        lebih lama dari `timeout` detik.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return get_pool().get_connection()
+        except errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+
+@contextmanager
+def connection():
+    """
+    Context manager koneksi pool; selalu dikembalikan ke pool.
+
+    Transaksi yang belum di-commit (termasuk transaksi baca saja) di-rollback sebelum
+    koneksi dikembalikan. Tanpa ini snapshot REPEATABLE READ terbawa ke peminjam
+    berikutnya (baris baru tidak pernah terlihat) dan metadata lock pada tabel tetap
+    dipegang sehingga ALTER TABLE ... PARTITION tertahan.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        try:
+            conn.rollback()
+        except mysql.connector.Error:
+            pass
+        conn.close()
+
+
+def execute(query, params=None, many=False, fetch=False, dictionary=False, idempotent=False):
+    """
+    Jalankan satu query lalu commit.
+
+    Jika koneksi gagal didapat dari pool, dicoba sekali lagi dengan koneksi baru.
+    Jika koneksi putus setelah query dikirim, server mungkin sudah menjalankan dan
+    meng-commit query tersebut, jadi query hanya diulang bila idempotent=True
+    (SELECT, atau penulisan yang aman dijalankan dua kali).
+
+    Return:
+        list baris (fetch=True) atau jumlah baris yang terpengaruh
+    """
+    for attempt in (1, 2):
+        sent = False
+        try:
+            with connection() as conn:
+                with conn.cursor(dictionary=dictionary) as cursor:
+                    sent = True
+                    if many:
+                        cursor.executemany(query, params)
+                    else:
+                        cursor.execute(query, params or ())
+                    result = cursor.fetchall() if fetch else cursor.rowcount
+                conn.commit()
+                return result
+        except CONNECTION_ERRORS:
+            if attempt == 2 or (sent and not idempotent):
+                raise
+            print("[DB] ⚠️ Koneksi MySQL terputus, mencoba ulang dengan koneksi baru...")
@@ -0,0 +1,39 @@
+import os
+from db import connection as mysql_connection
+
+# Akses status pengiriman (status/keterangan/dateterkirim untuk KLHK, has untuk HAS)
+# sesuai STORAGE_BACKEND, dipakai klhk/send.py, klhk/retry.py dan hasSend.py.
+#
+# STORAGE_BACKEND=mysql   : tabel data MySQL
+# STORAGE_BACKEND=postgres: tabel data PostgreSQL (kolom status/has yang sama, pgstore.py)
+# STORAGE_BACKEND=tsstore : tidak punya kolom status; service pengirim menolak start
+#
+# Query pengirim memakai placeholder %s yang sama untuk mysql.connector dan psycopg2;
+# nama kolom parameter harus lewat column() karena PostgreSQL butuh kutip ("do").
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mysql').lower()
+SUPPORTED = ("mysql", "postgres")
+
+
+def require_backend(service):
+    """Hentikan service pengirim jika backend penyimpanan tidak menyimpan status pengiriman."""
+    if STORAGE_BACKEND not in SUPPORTED:
+        print(f"❌ [{service}] STORAGE_BACKEND={STORAGE_BACKEND} tidak menyimpan status pengiriman; "
+              f"data tidak akan terkirim. Gunakan {' atau '.join(SUPPORTED)}. Service dihentikan.")
+        exit(1)
+
+
+def connection():
+    """Context manager koneksi ke database yang menyimpan status pengiriman."""
+    if STORAGE_BACKEND == "postgres":
+        import pgstore
+        return pgstore.connection()
+    return mysql_connection()
+
+
+def column(name):
+    """Nama kolom yang aman dipakai di query untuk backend aktif."""
+    if STORAGE_BACKEND == "postgres":
+        import pgstore
+        return pgstore.quote(name)
+    return f"`{name}`"
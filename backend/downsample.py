@@ -0,0 +1,120 @@
+import numpy as np
+
+# Downsampling deret waktu untuk grafik (/api/history?max_points=N).
+#
+# - lttb   : Largest-Triangle-Three-Buckets, memilih satu titik per bucket yang membentuk
+#            segitiga terbesar dengan titik terpilih sebelumnya dan rata-rata bucket
+#            berikutnya, sehingga bentuk kurva dan puncak tetap terlihat.
+# - minmax : titik minimum dan maksimum per bucket (puncak dijamin tidak hilang).
+#
+# Beberapa kolom (misalnya /api/history/batch) memakai satu grid bucket bersama: setiap
+# kolom dinormalkan ke rentang 0..1, lalu per bucket dipilih baris yang paling mewakili
+# semua kolom (luas segitiga dijumlahkan untuk lttb, kolom dengan rentang terlebar untuk
+# minmax). Hasilnya tetap paling banyak max_points baris berapa pun jumlah kolomnya.
+#
+# Semua fungsi mengembalikan indeks baris yang dipertahankan (urut), jadi kolom lain
+# (min/max rollup) bisa dipilih dengan indeks yang sama.
+
+METHODS = ("lttb", "minmax")
+
+
+def normalize(ys):
+    """Skala setiap kolom (baris array 2D) ke 0..1; NaN tetap NaN."""
+    with np.errstate(invalid="ignore"):
+        lo = np.nanmin(np.where(np.isnan(ys), np.inf, ys), axis=1, keepdims=True)
+        hi = np.nanmax(np.where(np.isnan(ys), -np.inf, ys), axis=1, keepdims=True)
+        span = np.where(hi > lo, hi - lo, 1.0)
+        return (ys - lo) / span
+
+
+def column_mean(ys, lo, hi):
+    """Rata-rata per kolom ys[:, lo:hi] tanpa NaN (NaN jika semua kosong)."""
+    part = ys[:, lo:hi]
+    count = np.sum(~np.isnan(part), axis=1)
+    total = np.sum(np.nan_to_num(part), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count
+
+
+def lttb(x, ys, n):
+    """
+    Indeks n baris hasil LTTB.
+
+    Argumen:
+        x: array float waktu (naik)
+        ys: array 2D (kolom x baris), sudah dinormalkan; NaN tidak menyumbang luas
+    """
+    ys = np.atleast_2d(ys)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    # Baris pertama dan terakhir selalu dipakai; sisanya dibagi n-2 bucket
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    selected = np.empty(n, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), column_mean(ys, hi, edges[i + 2])
+        else:
+            next_x, next_y = x[-1], ys[:, -1]
+        # Luas (x2) segitiga titik a, kandidat di bucket ini, dan rata-rata bucket berikutnya,
+        # dijumlahkan untuk semua kolom
+        ya = ys[:, a:a + 1]
+        area = np.abs((x[a] - next_x) * (ys[:, lo:hi] - ya) - (x[a] - x[lo:hi]) * (next_y[:, None] - ya))
+        a = lo + int(np.argmax(np.nan_to_num(area).sum(axis=0)))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x, ys, n):
+    """
+    Indeks baris min dan max di setiap bucket (paling banyak n baris), urut waktu.
+    Untuk beberapa kolom, per bucket dipakai min/max kolom dengan rentang terlebar.
+    """
+    ys = np.atleast_2d(ys)
+    size = ys.shape[1]
+    buckets = max(n // 2, 1)
+    if n >= size or buckets >= size:
+        return np.arange(size)
+    bucket = np.arange(size) * buckets // size
+    starts = np.searchsorted(bucket, np.arange(buckets))
+
+    low = np.where(np.isnan(ys), np.inf, ys)
+    high = np.where(np.isnan(ys), -np.inf, ys)
+    mins = np.empty((len(ys), buckets), dtype=np.int64)
+    maxs = np.empty((len(ys), buckets), dtype=np.int64)
+    for c in range(len(ys)):
+        # Urutkan per bucket lalu per nilai: elemen pertama bucket = min / max
+        mins[c] = np.lexsort((low[c], bucket))[starts]
+        maxs[c] = np.lexsort((-high[c], bucket))[starts]
+    columns = np.arange(len(ys))[:, None]
+    spread = high[columns, maxs] - low[columns, mins]
+    best = np.argmax(spread, axis=0)
+    cols = np.arange(buckets)
+    return np.unique(np.concatenate((mins[best, cols], maxs[best, cols])))
+
+
+def downsample(timestamps, columns, max_points, method="lttb"):
+    """
+    Pilih paling banyak max_points baris dari satu atau beberapa deret yang berbagi timestamp.
+
+    Argumen:
+        timestamps: datetime64 / Timestamp per baris (urut naik)
+        columns: list deret nilai per baris, None/NaN dianggap kosong
+
+    Return:
+        numpy.ndarray: indeks baris yang dipertahankan (terhadap input); baris yang
+        kosong di semua kolom dilewati
+    """
+    ys = np.array(
+        [[np.nan if v is None else v for v in values] for values in columns], dtype=np.float64
+    ).reshape(len(columns), len(timestamps))
+    valid = np.flatnonzero(~np.all(np.isnan(ys), axis=0))
+    if not max_points or len(valid) <= max_points:
+        return valid
+    x = np.asarray(timestamps, dtype="datetime64[s]").astype(np.int64).astype(np.float64)[valid]
+    pick = minmax if method == "minmax" else lttb
+    return valid[pick(x, normalize(ys[:, valid]), max_points)]
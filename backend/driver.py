@@ -0,0 +1,192 @@
+import json
+import os
+import struct
+import time
+from dotenv import load_dotenv
+from serialport import open_port
+from modbus import build_read_request, group_registers, transact, ModbusError, MAX_REGISTERS, DTYPES, BYTEORDERS
+
+# Driver Modbus RTU generik berbasis peta register deklaratif (config/devices.json).
+# Menambah sensor baru cukup dengan menambah entri di file peta register.
+
+env_path = "/opt/logger/config/env"  # env file path
+if not load_dotenv(dotenv_path=env_path):
+    print(f"Error: env file not found at {env_path}")
+    exit(1)
+
+DEVICE_MAP_PATH = os.getenv('DEVICE_MAP', "/opt/logger/config/devices.json")
+
+
+def _pad(n):
+    return f'{n}x' if n else ''
+
+
+class Block:
+    """Satu request baca (slave, fungsi, alamat, jumlah) beserta format decode-nya."""
+
+    def __init__(self, slave, function, start, count, fields):
+        self.slave = slave
+        self.function = function
+        self.start = start
+        self.count = count
+        self.request = build_read_request(slave, function, start, count)
+        self.fields = fields
+
+        # Susun satu format struct untuk seluruh blok (byte kosong di-skip dengan 'x')
+        fmt = '>'
+        cursor = 0
+        perm = list(range(2 * count))
+        for field in fields:
+            offset = (field['address'] - start) * 2
+            if offset < cursor:
+                raise ValueError(f"Register '{field['name']}' tumpang tindih pada 0x{field['address']:04X}")
+            code, regs = DTYPES[field['dtype']]
+            fmt += _pad(offset - cursor) + code
+            order = BYTEORDERS[field['byteorder']][0 if regs == 2 else 1]
+            for i, src in enumerate(order):
+                perm[offset + i] = offset + src
+            cursor = offset + regs * 2
+        fmt += _pad(2 * count - cursor)
+        self.struct = struct.Struct(fmt)
+        # Permutasi byte hanya dipakai jika ada register non big-endian
+        self.perm = None if perm == list(range(2 * count)) else perm
+
+    def decode(self, payload):
+        if self.perm is not None:
+            payload = bytes([payload[i] for i in self.perm])
+        values = {}
+        for field, raw in zip(self.fields, self.struct.unpack(payload)):
+            value = raw
+            if field['scale'] != 1 or field['offset'] != 0:
+                value = raw * field['scale'] + field['offset']
+            if field['round'] is not None:
+                value = round(value, field['round'])
+            values[field['name']] = value
+        return values
+
+
+class Device:
+    """Perangkat Modbus RTU yang dibangun dari satu entri peta register."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.status = os.getenv(spec['status_env'], 'inactive') if 'status_env' in spec else spec.get('status', 'active')
+        self.port = os.getenv(spec['port_env']) if 'port_env' in spec else spec.get('port')
+        self.settings = {
+            'baudrate': int(spec.get('baudrate', 19200)),
+            'bytesize': int(spec.get('bytesize', 8)),
+            'parity': spec.get('parity', 'N'),
+            'stopbits': spec.get('stopbits', 1),
+            'timeout': float(spec.get('timeout', 1)),
+        }
+        self.retries = int(spec.get('retries', 3))
+        self.retry_delay = float(spec.get('retry_delay', 0.5))
+
+        fields = []
+        for reg in spec['registers']:
+            dtype = reg.get('dtype', spec.get('dtype', 'float32'))
+            if dtype not in DTYPES:
+                raise ValueError(f"dtype '{dtype}' tidak dikenal pada {name}.{reg['name']}")
+            byteorder = reg.get('byteorder', spec.get('byteorder', 'ABCD')).upper()
+            if byteorder not in BYTEORDERS:
+                raise ValueError(f"byteorder '{byteorder}' tidak dikenal pada {name}.{reg['name']}")
+            fields.append({
+                'name': reg['name'],
+                'slave': int(reg.get('slave', spec.get('slave', 1))),
+                'function': int(reg.get('function', spec.get('function', 3))),
+                'address': int(str(reg['address']), 0),
+                'count': int(reg.get('count', DTYPES[dtype][1])),
+                'dtype': dtype,
+                'byteorder': byteorder,
+                'scale': reg.get('scale', 1),
+                'offset': reg.get('offset', 0),
+                'round': reg.get('round'),
+            })
+        # Urutan nilai mengikuti urutan register di peta
+        self.fields = tuple(f['name'] for f in fields)
+
+        # Register dengan slave & fungsi yang sama digabung menjadi blok baca
+        max_gap = int(spec.get('max_gap', 32))
+        max_span = int(spec.get('max_span', MAX_REGISTERS))
+        by_target = {}
+        for f in fields:
+            by_target.setdefault((f['slave'], f['function']), []).append(f)
+        self.blocks = []
+        for (slave, function), group in by_target.items():
+            lookup = {f['name']: f for f in group}
+            for start, count, items in group_registers(
+                    [(f['name'], f['address'], f['count']) for f in group], max_gap, max_span):
+                self.blocks.append(Block(slave, function, start, count, [lookup[n] for n, _, _ in items]))
+
+        # Request ringan untuk mengecek apakah perangkat merespons (register pertama saja)
+        first = self.blocks[0].fields[0]
+        self.probe_block = Block(first['slave'], first['function'], first['address'], first['count'], [first])
+
+    def is_active(self):
+        return (self.status or '').lower() == 'active'
+
+    def read_block(self, ser, block):
+        for attempt in range(1, self.retries + 1):
+            try:
+                response = transact(ser, block.request, self.settings['timeout'])
+                return block.decode(response[3:3 + 2 * block.count])
+            except ModbusError as e:
+                print(f"[{self.name.upper()}] Percobaan {attempt}/{self.retries}: {e} "
+                      f"(blok 0x{block.start:04X}, {block.count} register)")
+                if attempt < self.retries:
+                    time.sleep(self.retry_delay)  # Tunggu sebelum mencoba lagi
+        return None
+
+    def read(self):
+        """
+        Baca semua blok perangkat dalam satu sesi port.
+
+        Return:
+            dict | None: nama parameter -> nilai (None untuk blok yang gagal),
+            atau None jika port tidak tersedia / error port.
+        """
+        if not self.port or not os.path.exists(self.port):
+            print(f"[ERROR] Port {self.port} untuk {self.name.upper()} tidak tersedia. Membatalkan pembacaan.")
+            return None
+
+        values = dict.fromkeys(self.fields)
+        try:
+            with open_port(self.port, **self.settings) as ser:
+                for block in self.blocks:
+                    decoded = self.read_block(ser, block)
+                    if decoded is not None:
+                        values.update(decoded)
+        except Exception as e:
+            print(f"[ERROR] Gagal membaca {self.name.upper()} di {self.port}: {e}")
+            return None
+        return values
+
+    def probe(self):
+        """Satu request tanpa retry. Return True jika perangkat membalas frame yang valid."""
+        if not self.port or not os.path.exists(self.port):
+            return False
+        try:
+            with open_port(self.port, **self.settings) as ser:
+                transact(ser, self.probe_block.request, self.settings['timeout'])
+            return True
+        except Exception as e:
+            print(f"[{self.name.upper()}] Probe gagal: {e}")
+            return False
+
+
+def load_devices(path=DEVICE_MAP_PATH):
+    with open(path, 'r') as f:
+        spec = json.load(f)
+    return {name: Device(name, dev) for name, dev in spec.items()}
+
+
+DEVICES = load_devices()
+
+
+def get_device(name):
+    return DEVICES[name]
+
+
+def read_device(name):
+    """Baca perangkat berdasarkan nama di peta register. Lihat Device.read()."""
+    return DEVICES[name].read()
@@ -8,6 +8,8 @@ import mysql.connector
 from datetime import datetime
 from collections import defaultdict
 from dotenv import load_dotenv
+# Koneksi status pengiriman sesuai STORAGE_BACKEND (MySQL atau PostgreSQL)
+from delivery import connection, require_backend
 
 # Load environment variables
 env_path = "/opt/logger/config/env"
@@ -17,24 +19,11 @@ if not load_dotenv(dotenv_path=env_path):
 
 # Config from env
 STATUS = os.getenv("HAS_STATUS")
-HOST = os.getenv('DB_HOST')
-USER = os.getenv('DB_USER')
-PASSWORD = os.getenv('DB_PASSWORD')
-DATABASE = os.getenv('DB_NAME')
-PORT = int(os.getenv('DB_PORT'))
 TIMEZONE = os.getenv('TIMEZONE', 'Asia/Jakarta')
 API_ENDPOINT = os.getenv('HAS_API_URL')
 API_JWT = os.getenv('HAS_TOKEN')
 tz = pytz.timezone(TIMEZONE)
 
-MYSQL_CONFIG = {
-    'host': HOST,
-    'user': USER,
-    'password': PASSWORD,
-    'database': DATABASE,
-    'port': PORT
-}
-
 def write_log(message):
     timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
@@ -46,9 +35,9 @@ def ambil_data():
     grouped_data = defaultdict(list)
 
     try:
-        with mysql.connector.connect(**MYSQL_CONFIG) as conn:
+        with connection() as conn:
             with conn.cursor() as cursor:
-                cursor.execute(f"SELECT * FROM ( SELECT * FROM data WHERE has = '0' UNION ALL  SELECT * FROM data WHERE has = '0' ) AS gabung ")
+                cursor.execute("SELECT * FROM data WHERE has = 0")
                 rows = cursor.fetchall()
                 
                 if rows:
@@ -90,12 +79,11 @@ def send_data():
         response = requests.post(API_ENDPOINT, json={"token": encoded}, headers=headers)
         result = response.json()
 
-        with mysql.connector.connect(**MYSQL_CONFIG) as conn:
+        with connection() as conn:
             with conn.cursor() as cursor:
                 if result:
                     now = datetime.now(tz)
-                    cursor.execute("UPDATE tmp SET has='1', WHERE has ='0'")
-                    cursor.execute("UPDATE data SET has='1', WHERE has ='0'")
+                    cursor.execute("UPDATE data SET has = 1 WHERE has = 0")
                     conn.commit()
                     write_log("✅ Data berhasil dikirim & diproses.")
                 else:
@@ -125,4 +113,5 @@ def scheduler():
         write_log("🛑 Service dihentikan manual.")
 
 if __name__ == "__main__":
+    require_backend("HAS API")
     scheduler()
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# Pelacakan kesehatan perangkat dengan circuit breaker.
+#
+# closed    : perangkat dibaca normal
+# open      : setelah BREAKER_THRESHOLD kegagalan berturut-turut perangkat dilewati
+#             selama cool-down yang terus membesar (BREAKER_COOLDOWN x 2^n, maks BREAKER_MAX_COOLDOWN)
+# half_open : cool-down habis, perangkat dicoba dengan satu request ringan (probe);
+#             berhasil -> closed, gagal -> open dengan cool-down lebih panjang
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', '3'))
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', '60'))
+BREAKER_MAX_COOLDOWN = float(os.getenv('BREAKER_MAX_COOLDOWN', '1800'))
+HEALTH_FILE = os.getenv('HEALTH_FILE', "/opt/logger/data/device_health.json")
+
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.last_success = None
+        self.last_failure = None
+        self.last_error = None
+
+    def allow(self):
+        """
+        Return:
+            str: "read" (baca normal), "probe" (coba satu request ringan) atau "skip"
+        """
+        if self.state == CLOSED:
+            return "read"
+        if time.monotonic() >= self.open_until:
+            self.state = HALF_OPEN
+            return "probe"
+        return "skip"
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"[HEALTH] ✅ {self.name.upper()} kembali merespons. Circuit ditutup.")
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.last_success = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.last_error = None
+
+    def record_failure(self, error=None):
+        self.failures += 1
+        self.last_failure = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.last_error = error
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self.trips += 1
+            cooldown = min(self.base_cooldown * 2 ** (self.trips - 1), self.max_cooldown)
+            self.state = OPEN
+            self.open_until = time.monotonic() + cooldown
+            print(f"[HEALTH] ⛔ {self.name.upper()} gagal {self.failures}x berturut-turut. "
+                  f"Dilewati selama {cooldown:.0f} detik.")
+
+    def snapshot(self):
+        remaining = max(0.0, self.open_until - time.monotonic()) if self.state == OPEN else 0.0
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": round(remaining),
+            "last_success": self.last_success,
+            "last_failure": self.last_failure,
+            "last_error": self.last_error,
+        }
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def guarded_read(name, read, probe=None):
+    """
+    Jalankan pembacaan perangkat lewat circuit breaker.
+
+    Argumen:
+        name (str): nama perangkat
+        read (callable): pembacaan penuh, return None / nilai kosong jika gagal
+        probe (callable): request ringan satu kali, return True jika perangkat merespons
+
+    Return:
+        hasil read(), atau None jika perangkat sedang dilewati / gagal
+    """
+    breaker = get_breaker(name)
+    action = breaker.allow()
+
+    if action == "skip":
+        print(f"[HEALTH] ⏭️ {name.upper()} dilewati (circuit open, coba lagi {breaker.snapshot()['retry_in']} detik).")
+        return None
+
+    if action == "probe" and probe is not None:
+        try:
+            alive = probe()
+        except Exception as e:
+            alive = False
+            print(f"[HEALTH] Probe {name.upper()} error: {e}")
+        if not alive:
+            breaker.record_failure("probe gagal")
+            return None
+
+    try:
+        values = read()
+    except Exception as e:
+        breaker.record_failure(str(e))
+        raise
+
+    if not values or (isinstance(values, dict) and all(v is None for v in values.values())):
+        breaker.record_failure("tidak ada data")
+    else:
+        breaker.record_success()
+    return values
+
+
+def save_health(path=HEALTH_FILE):
+    """Tulis status semua perangkat ke file JSON (dibaca oleh dashboard)."""
+    with _lock:
+        state = {name: breaker.snapshot() for name, breaker in _breakers.items()}
+    payload = {"updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "devices": state}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"[HEALTH] Gagal menyimpan status perangkat: {e}")
@@ -1,14 +1,18 @@
 import time
 import os
-from at500 import get_at500_data
-from mace import get_mace_data
-from spectro import read_modbus_tcp
-from rt200 import get_rt200_data
-from sem5096 import get_sem5096_data
-from config import insert_data, ambilDate, ambilDateTime
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from driver import DEVICES
+from spectro import read_modbus_tcp, probe as probe_spectro
+from config import cekTable, insert_data, ambilDate, ambilDateTick, tz, SPOOL
+from scheduler import TickScheduler
+from aggregate import WindowAggregator
+from health import guarded_read, save_health
 from dotenv import load_dotenv
-import sqlite3
+import rainipc
+from snapshot import SnapshotWriter
+from serialport import close_all
 import pytz
 
 # Load environment variables
@@ -19,213 +23,352 @@ if not load_dotenv(dotenv_path=env_path):
 
 # Configuration from environment variables
 DELAY = int(os.getenv('DELAY'))
-AT500_STATUS = os.getenv('AT500_STATUS')
-MACE_STATUS = os.getenv('MACE_STATUS')
 SPECTRO_STATUS = os.getenv('SPECTRO_STATUS')
-RT200_STATUS = os.getenv('RT200_STATUS')
-SEM5096_STATUS = os.getenv('SEM5096_STATUS')
 ARG314_STATUS = os.getenv('ARG314_STATUS')
+SPECTRO_IP = os.getenv('SPECTRO_IP')
+SPECTRO_PORT = os.getenv('SPECTRO_PORT')
 
+# Batas waktu pembacaan semua bus dalam satu siklus (detik)
+CYCLE_DEADLINE = float(os.getenv('CYCLE_DEADLINE', '45'))
+# Mode agregasi: sampling tiap SAMPLE_INTERVAL detik, simpan 1 baris per DELAY menit (0 = nonaktif)
+SAMPLE_INTERVAL = int(os.getenv('SAMPLE_INTERVAL', '0'))
+WINDOW_SECONDS = DELAY * 60
+# Tick harus jatuh tepat di batas menit dan batas jendela, jika tidak jendela bergeser
+if SAMPLE_INTERVAL > 0 and (60 % SAMPLE_INTERVAL or WINDOW_SECONDS % SAMPLE_INTERVAL):
+    print(f"Error: SAMPLE_INTERVAL={SAMPLE_INTERVAL} harus habis membagi 60 dan DELAY*60 ({WINDOW_SECONDS})")
+    exit(1)
+
+# Urutan parameter sesuai argumen insert_data()
+PARAMETERS = (
+    'ph', 'orp', 'tds', 'conduct', 'do', 'salinity', 'nh3n',
+    'battery', 'depth', 'flow', 'tflow',
+    'turb', 'tss', 'cod', 'bod', 'no3', 'temp',
+    'press', 'hum', 'wspeed', 'wdir', 'rain', 'srad',
+)
+SPECTRO_FIELDS = ('turb', 'tss', 'cod', 'bod', 'no3', 'temp')
+
+# Snapshot data terbaru untuk /api/latest (dibuka saat service start)
+snapshot = None
 
-# SQLite Database GPIO
-DB_PATH = os.getenv("SQLITE_DB_PATH", "/opt/logger/data/gpio_logger.db")
+# Curah hujan yang sudah diambil dari daemon ARG314 (take mengosongkan hitungannya) tetapi
+# barisnya tidak tersimpan; ditambahkan ke baris berikutnya yang tersimpan. Disimpan di
+# file agar tidak hilang saat service restart.
+RAIN_CARRY_FILE = os.getenv('RAIN_CARRY_FILE', "/opt/logger/data/rain_carry.json")
 
-def connect_db():
-    """Membuka koneksi ke database SQLite."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+
+def read_spectro():
+    data = read_modbus_tcp()
+    if not data or all(value is None for value in data):
+        return None
+    return dict(zip(SPECTRO_FIELDS, data))
 
 
-def get_sensor_gpio(current_date, sensor, auto_delete=True):
+def read_rain(current_date):
+    """Curah hujan GPIO (mm) sejak jendela sebelumnya, diambil dari daemon ARG314 lewat socket."""
+    reply = rainipc.take(current_date)
+    if reply is None:
+        return None
+    print(f"[GPIO] ✅ Curah hujan seq {reply['seq']} ({reply['since']} - {reply['until']}): {reply['mm']} mm")
+    return reply["mm"]
+
+
+def load_rain_carry():
+    try:
+        with open(RAIN_CARRY_FILE) as f:
+            return float(json.load(f).get("mm", 0))
+    except (OSError, ValueError):
+        return 0.0
+
+
+def save_rain_carry(mm):
+    os.makedirs(os.path.dirname(RAIN_CARRY_FILE), exist_ok=True)
+    tmp = RAIN_CARRY_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"mm": mm}, f)
+    os.replace(tmp, RAIN_CARRY_FILE)
+
+
+def hold_rain(current_date, rain):
+    """Tahan curah hujan yang sudah diambil tetapi barisnya tidak disimpan."""
+    if not rain:
+        return
+    carry = round(load_rain_carry() + rain, 3)
+    save_rain_carry(carry)
+    print(f"[{current_date}] 💧 Curah hujan {rain} mm ditahan untuk baris berikutnya (total {carry} mm).")
+
+
+def build_buses(current_date, gpio=True):
     """
-    Mengambil data terbaru dari tabel gpio berdasarkan nama sensor dan datetime tertentu.
-    
+    Kelompokkan sumber data aktif per bus fisik.
+
+    Setiap port serial (/dev/ttyAMA*), endpoint Modbus TCP dan GPIO adalah satu bus
+    yang dibaca oleh worker sendiri. Sensor pada bus yang sama tetap dibaca berurutan.
+    Sumber dengan fungsi probe dibaca lewat circuit breaker (lihat health.py).
+
     Argumen:
-        sensor (str): nama sensor, misalnya 'rain_sensor'
-        current_date (str): waktu dalam format 'YYYY-MM-DD HH:MM:SS'
-        auto_delete (bool): jika True, hapus data lama di tanggal yang sama setelah dibaca.
-        
+        gpio (bool): sertakan curah hujan GPIO (akumulasi, hanya dibaca di akhir jendela)
+
     Return:
-        float | None: nilai sensor terbaru pada tanggal yang sama, atau None jika tidak ada data.
+        dict: bus -> [(nama_sumber, fungsi_baca, fungsi_probe | None), ...]
     """
-    
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        # Ambil data terbaru di tanggal yang sama dengan current_date
-        cursor.execute("""
-            SELECT id, `date`, nilai 
-            FROM gpio
-            WHERE sensor = ?
-              AND `date` = ?
-            ORDER BY `date` DESC
-            LIMIT 1;
-        """, (sensor, current_date))
-        result = cursor.fetchone()
- 
-        if result:
-            latest_id, latest_date, nilai = result
-
-            if auto_delete:
-                # Hapus semua data ketika data sudah diambil
-                cursor.execute("""
-                    DELETE FROM gpio
-                    WHERE sensor = ?
-                      AND `date` <= ?
-                """, (sensor, current_date))
-                conn.commit()
-                print(f"[GPIO] 🔄 Hapus data lama sensor '{sensor}' ")
-
-            print(f"[GPIO] ✅ Data terbaru sensor '{sensor}' untuk {latest_date}: {nilai}")
-            return nilai
+    buses = {}
+    for name, device in DEVICES.items():
+        if device.is_active():
+            buses.setdefault(device.port, []).append((name, device.read, device.probe))
+
+    if SPECTRO_STATUS.lower() == "active":
+        buses.setdefault(f"tcp://{SPECTRO_IP}:{SPECTRO_PORT}", []).append(('spectro', read_spectro, probe_spectro))
+
+    if gpio and ARG314_STATUS.lower() == "active":
+        # GPIO tidak memakai circuit breaker: nilai kosong berarti memang tidak ada hujan
+        buses.setdefault("gpio", []).append(('arg314', lambda: read_rain(current_date), None))
+
+    return buses
+
+
+def read_bus(sources):
+    """Baca semua sumber pada satu bus secara berurutan."""
+    results = {}
+    for name, read, probe in sources:
+        try:
+            if probe is None:
+                results[name] = read()
+            else:
+                results[name] = guarded_read(name, read, probe)
+        except Exception as e:
+            print(f"[ERROR] Gagal membaca {name.upper()}: {e}")
+            results[name] = None
+    return results
+
+
+def acquire(executor, pending, current_date, deadline=CYCLE_DEADLINE, gpio=True):
+    """
+    Baca semua bus secara paralel dengan batas waktu per siklus.
+
+    Argumen:
+        executor (ThreadPoolExecutor): worker bus
+        pending (dict): bus -> future dari siklus sebelumnya yang belum selesai
+        current_date (str): waktu siklus
+        deadline (float): batas waktu pembacaan (detik)
+        gpio (bool): sertakan curah hujan GPIO
+
+    Return:
+        tuple: (record dict parameter -> nilai, status_filter)
+    """
+    buses = build_buses(current_date, gpio)
+    futures = {}
+    for bus, sources in buses.items():
+        previous = pending.get(bus)
+        if previous is not None and not previous.done():
+            print(f"[{current_date}] ⚠️ Bus {bus} masih sibuk dari siklus sebelumnya. Dilewati.")
+            continue
+        futures[bus] = executor.submit(read_bus, sources)
+
+    done, _ = wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for bus, future in futures.items():
+        if future in done:
+            results.update(future.result())
+            pending.pop(bus, None)
         else:
-            print(f"[GPIO] ⚠️ Tidak ada data sensor '{sensor}' untuk tanggal {current_date}")
-            return None
+            print(f"[{current_date}] ⏰ Bus {bus} melewati batas waktu {deadline:.0f} detik.")
+            pending[bus] = future
+
+    save_health()
+
+    # Gabungkan hasil: sumber yang lebih dulu (urutan peta register, lalu SPECTRO) diutamakan
+    record = dict.fromkeys(PARAMETERS)
+    status_filter = True
+    order = [name for name, device in DEVICES.items() if device.is_active()]
+    if SPECTRO_STATUS.lower() == "active":
+        order.append('spectro')
+
+    for name in order:
+        values = results.get(name)
+        if not values:
+            status_filter = False
+            print(f"[{current_date}] ⚠️ Gagal membaca data {name.upper()}.")
+            continue
+        for key, value in values.items():
+            if key in record and record[key] is None:
+                record[key] = value
+
+    # === GPIO Sensors ARG314 ===
+    if gpio and ARG314_STATUS.lower() == "active":
+        rain = results.get('arg314')
+        record['rain'] = rain if rain is not None else record['rain']
+
+    return record, status_filter
+
 
+def save_record(current_date, current_datetime, record, samples=0, stats=None):
+    if not build_buses(current_date):
+        print(f"[{current_date}] ⚠️ Semua modul sensor tidak aktif. Melewati penyimpanan data.")
+        return
+
+    # Curah hujan dari jendela yang barisnya tidak tersimpan masuk ke baris ini
+    carry = load_rain_carry()
+    if carry:
+        record = {**record, 'rain': round((record['rain'] or 0) + carry, 3)}
+
+    print("\n=== SENSOR DATA ===")
+    if samples:
+        print(f"→ Agregasi {samples} sampel")
+    print(f"→ pH: {record['ph']}, ORP: {record['orp']}, TDS: {record['tds']}, Conductivity: {record['conduct']}, DO: {record['do']}, Salinity: {record['salinity']}, NH3-N: {record['nh3n']}")
+    print(f"→ Battery: {record['battery']}, Depth: {record['depth']}, Flow: {record['flow']}, TFlow: {record['tflow']}")
+    print(f"→ Turbidity: {record['turb']}, TSS: {record['tss']}, COD: {record['cod']}, BOD: {record['bod']}, NO3: {record['no3']}, Temp: {record['temp']}")
+    print(f"→ Press: {record['press']} Hum: {record['hum']}, WSpeed: {record['wspeed']}, WDir: {record['wdir']}, Rain: {record['rain']}, SRad: {record['srad']}")
+    print("===================  \n")
+
+    insert_data(
+        current_date,
+        current_datetime,
+        *(record[param] for param in PARAMETERS),
+        samples=samples,
+        stats=stats
+    )
+    if carry:
+        save_rain_carry(0.0)
+    publish_snapshot(current_date, record, samples)
+
+
+def publish_snapshot(current_date, record, samples=0):
+    """Terbitkan record yang baru disimpan ke snapshot shared memory (untuk /api/latest)."""
+    if snapshot is None:
+        return
+    try:
+        snapshot.publish({**record, "date": current_date, "samples": samples, "published": time.time()})
     except Exception as e:
-        print(f"[ERROR] Gagal mengambil data dari database: {e}")
-        return None
+        print(f"[{current_date}] ⚠️ Gagal menulis snapshot: {e}")
 
-    finally:
-        if 'cursor' in locals(): cursor.close()
-        if 'conn' in locals(): conn.close()
+
+def window_bounds(tick):
+    """
+    Awal dan akhir jendela agregasi yang memuat tick.
+
+    Jendela dijajarkan ke awal jam seperti TickScheduler, jadi jika DELAY tidak habis
+    membagi 60 jendela terakhir tiap jam lebih pendek dan berakhir tepat di awal jam.
+    """
+    hour_start = tick.replace(minute=0, second=0, microsecond=0)
+    elapsed = (tick - hour_start).total_seconds()
+    offset = int(elapsed // WINDOW_SECONDS) * WINDOW_SECONDS
+    end = min(offset + WINDOW_SECONDS, 3600)
+    return (tz.normalize(hour_start + timedelta(seconds=offset)),
+            tz.normalize(hour_start + timedelta(seconds=end)))
 
 
+def close_window(aggregator, current_date, current_datetime, rain):
+    """Tutup jendela agregasi: simpan rata-rata sebagai nilai baris dan min/max/std/n sebagai statistik."""
+    samples = aggregator.size
+    if samples == 0:
+        print(f"[{current_date}] ❌ Tidak ada sampel valid dalam jendela ini. Data tidak disimpan.")
+        hold_rain(current_date, rain)
+        return
 
-def should_run():
-    """Check if the script should run based on the current time and DELAY setting."""
-    now = datetime.now()
-    return now.minute % DELAY == 0 and now.second == 0
+    summary = aggregator.summarize()
+    aggregator.reset()
 
+    record = {param: summary[param]["mean"] for param in PARAMETERS}
+    stats = {param: {k: v for k, v in s.items() if k != "mean"} for param, s in summary.items() if s["n"]}
+    # Curah hujan GPIO adalah akumulasi jendela, bukan rata-rata sampel
+    if rain is not None:
+        record['rain'] = rain
+
+    print(f"[{current_date}] ✅ Jendela {DELAY} menit ditutup ({samples} sampel).")
+    save_record(current_date, current_datetime, record, samples, stats)
 
 
 def main():
     current_date = ambilDate()
-    print(f"[{current_date}] ⏱️ Service dimulai. Menunggu waktu eksekusi sensor setiap {DELAY} menit.")
-    last_run = None
-    
-    # Initialize variables with default values (None)
-    ph, orp, tds, conduct, do, salinity, nh3n = (None,) * 7
-    battery, depth, flow, tflow = (None,) * 4
-    turb, tss, cod, bod, no3, temp = (None,) * 6
-    press, hum, wspeed, wdir, rain, srad = (None,) * 6
+    # Skema database dibuat sekali di awal, bukan di setiap insert
+    if cekTable():
+        print(f"[{current_date}] ✅ Skema database siap.")
+    # Data ditulis ke spool lokal; thread ini yang memindahkannya ke MySQL
+    SPOOL.start()
+    global snapshot
+    try:
+        snapshot = SnapshotWriter()
+    except OSError as e:
+        print(f"[{current_date}] ⚠️ Snapshot data terbaru tidak aktif: {e}")
+    aggregate_mode = SAMPLE_INTERVAL > 0
+    if aggregate_mode:
+        print(f"[{current_date}] ⏱️ Service dimulai. Sampling tiap {SAMPLE_INTERVAL} detik, agregasi setiap {DELAY} menit.")
+    else:
+        print(f"[{current_date}] ⏱️ Service dimulai. Menunggu waktu eksekusi sensor setiap {DELAY} menit.")
+
+    interval = SAMPLE_INTERVAL if aggregate_mode else DELAY * 60
+    deadline = min(CYCLE_DEADLINE, interval)
+    bus_count = len(build_buses(current_date))
+    executor = ThreadPoolExecutor(max_workers=max(bus_count, 1), thread_name_prefix="bus")
+    pending = {}
+    scheduler = TickScheduler(interval, tz)
+    aggregator = None
+    if aggregate_mode:
+        # Kapasitas satu jendela penuh ditambah cadangan untuk tick yang terlambat
+        aggregator = WindowAggregator(PARAMETERS, WINDOW_SECONDS // SAMPLE_INTERVAL + 2)
+    current_window = None
+    window_close = None
     
     try:
         while True:
-            now = datetime.now()
-            if should_run():
-                # Ensure we don't run twice at the same time
-                if last_run != now.replace(second=0, microsecond=0):
-                    current_date = ambilDate()
-                    current_datetime = ambilDateTime()
-                    print(f"\n[{current_date}] 📡 Membaca semua sensor...")
-                    
-                    status_filter = True
-                    
-                    # === AT500 ===
-                    if AT500_STATUS.lower() == "active":
-                        at500_data = get_at500_data()
-                        if at500_data:
-                            ph, orp, tds, conduct, do, salinity, nh3n = at500_data
-                        else:
-                            status_filter = False
-                            print(f"[{current_date}] ⚠️ Gagal membaca data AT500.")
-                    
-                    # === RT200 ===
-                    if RT200_STATUS.lower() == "active":
-                        rt200_data = get_rt200_data()
-                        if rt200_data:
-                            temp_rt200, press_rt200, depth_rt200 = rt200_data
-                            # Use RT200 values if not already set
-                            temp = temp_rt200 if temp is None else temp
-                            press = press_rt200 if press is None else press
-                            depth = depth_rt200 if depth is None else depth
-                        else:
-                            status_filter = False
-                            print(f"[{current_date}] ⚠️ Gagal membaca data RT200.")
-                    
-                    # === SEM5096 ===
-                    if SEM5096_STATUS.lower() == "active":
-                        sem5096_data = get_sem5096_data()
-                        if sem5096_data:
-                            temp_sem5096, hum_sem5096, press_sem5096, wspeed_sem5096, wdir_sem5096, rain_sem5096, srad_sem5096 = sem5096_data
-                            # Use SEM5096 values if not already set
-                            temp = temp_sem5096 if temp is None else temp
-                            hum = hum_sem5096 if hum is None else hum
-                            press = press_sem5096 if press is None else press
-                            wspeed = wspeed_sem5096 if wspeed is None else wspeed
-                            wdir = wdir_sem5096 if wdir is None else wdir
-                            rain = rain_sem5096 if rain is None else rain
-                            srad = srad_sem5096 if srad is None else srad
-                        else:
-                            status_filter = False
-                            print(f"[{current_date}] ⚠️ Gagal membaca data SEM5096.")
-                    
-                    
-                    # === MACE ===
-                    if MACE_STATUS.lower() == "active":
-                        mace_data = get_mace_data()
-                        if mace_data:
-                            battery_mace, depth_mace, flow_mace, tflow_mace = mace_data
-                            # Use MACE values if not already set
-                            battery = battery_mace if battery is None else battery
-                            depth = depth_mace if depth is None else depth
-                            flow = flow_mace if flow is None else flow
-                            tflow = tflow_mace if tflow is None else tflow
-                        else:
-                            status_filter = False
-                            print(f"[{current_date}] ⚠️ Gagal membaca data MACE.")
-                    
-                    # === SPECTRO ===
-                    if SPECTRO_STATUS.lower() == "active":
-                        modbus_data = read_modbus_tcp()
-                        if modbus_data:
-                            turb, tss, cod, bod, no3, temp_spectro = modbus_data
-                            # Use SPECTRO temperature value if not already set
-                            temp = temp_spectro if temp is None else temp
-                        else:
-                            status_filter = False
-                            print(f"[{current_date}] ⚠️ Gagal membaca data Modbus TCP.")
-                    
-                    # === GPIO Sensors ARG314 ===
-                    if ARG314_STATUS.lower() == "active":
-                        time.sleep(4)   #jika GPIO aktif delay 4 detik agar tidak bentrok saat pengambilan data
-                        data = get_sensor_gpio(current_date,"rain_sensor")
-                        rain = data if data is not None else rain
-                        
-                    
-                    # Save data if all active sensors were read successfully
-                    if status_filter:
-                        # Check if any sensor is active
-                        if all(status.lower() != "active" for status in [AT500_STATUS, MACE_STATUS, SPECTRO_STATUS, SEM5096_STATUS, RT200_STATUS, ARG314_STATUS]):
-                            print(f"[{current_date}] ⚠️ Semua modul sensor tidak aktif. Melewati penyimpanan data.")
-                        else:
-                            print(f"[{current_date}] ✅ Semua data sensor berhasil terbaca.")
-                            print("\n=== SENSOR DATA ===")
-                            print(f"→ pH: {ph}, ORP: {orp}, TDS: {tds}, Conductivity: {conduct}, DO: {do}, Salinity: {salinity}, NH3-N: {nh3n}")
-                            print(f"→ Battery: {battery}, Depth: {depth}, Flow: {flow}, TFlow: {tflow}")
-                            print(f"→ Turbidity: {turb}, TSS: {tss}, COD: {cod}, BOD: {bod}, NO3: {no3}, Temp: {temp}")
-                            print(f"→ Press: {press} Hum: {hum}, WSpeed: {wspeed}, WDir: {wdir}, Rain: {rain}, SRad: {srad}")
-                            print("===================  \n")
-                            
-                            insert_data(
-                                current_date,
-                                current_datetime,
-                                ph, orp, tds, conduct, do, salinity, nh3n,
-                                battery, depth, flow, tflow,
-                                turb, tss, cod, bod, no3, temp,
-                                press, hum, wspeed, wdir, rain, srad
-                            )
-                    else:
-                        print(f"[{current_date}] ❌ Tidak semua sensor berhasil terbaca. Data tidak disimpan.")
-                    
-                    last_run = now.replace(second=0, microsecond=0)
+            # Tidur sampai tick berikutnya; data dicap dengan waktu tick terjadwal
+            tick = scheduler.wait()
+            current_date, current_datetime = ambilDateTick(tick)
+
+            if aggregate_mode:
+                # Jendela ditutup oleh tick pertama di jendela berikutnya, jadi tick batas
+                # yang terlambat atau dilewati scheduler tidak membuat dua jendela tergabung
+                window, close_at = window_bounds(tick)
+                window_end = current_window is not None and window != current_window
+                if window_end:
+                    # Baris dicap dengan akhir jendela yang ditutup
+                    end_date, end_datetime = ambilDateTick(window_close)
+                current_window, window_close = window, close_at
+
+                # Curah hujan GPIO hanya dibaca saat jendela ditutup, paralel dengan sampel
+                rain_future = None
+                if window_end and ARG314_STATUS.lower() == "active":
+                    rain_future = executor.submit(read_rain, end_date)
+
+                record, status_filter = acquire(executor, pending, current_date, deadline, gpio=False)
+
+                if window_end:
+                    rain = None
+                    if rain_future is not None:
+                        try:
+                            rain = rain_future.result(timeout=CYCLE_DEADLINE)
+                        except Exception as e:
+                            print(f"[{current_date}] ⚠️ Gagal membaca curah hujan GPIO: {e}")
+                    close_window(aggregator, end_date, end_datetime, rain)
+
+                # Sampel tick ini milik jendela yang baru dimulai
+                if status_filter:
+                    aggregator.add(record)
+                else:
+                    print(f"[{current_date}] ⚠️ Sampel dilewati, tidak semua sensor terbaca.")
+                continue
+
+            print(f"\n[{current_date}] 📡 Membaca semua sensor...")
+
+            started = time.monotonic()
+            record, status_filter = acquire(executor, pending, current_date, deadline)
+            print(f"[{current_date}] ⏱️ Pembacaan selesai dalam {time.monotonic() - started:.2f} detik.")
             
-            time.sleep(0.5)
+            # Save data if all active sensors were read successfully
+            if status_filter:
+                print(f"[{current_date}] ✅ Semua data sensor berhasil terbaca.")
+                save_record(current_date, current_datetime, record)
+            else:
+                print(f"[{current_date}] ❌ Tidak semua sensor berhasil terbaca. Data tidak disimpan.")
+                hold_rain(current_date, record['rain'])
     
     except KeyboardInterrupt:
         print(f"\n[{current_date}] 🛑 Service dihentikan secara manual.")
+    finally:
+        executor.shutdown(wait=False)
+        close_all()
+        SPOOL.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,265 @@
+import argparse
+from datetime import datetime
+from db import connection
+from partitions import partition_by_month
+import rollups
+
+# Migrasi skema berversi untuk database MySQL logger.
+#
+# Setiap migrasi punya nomor versi unik dan daftar langkah (string SQL atau fungsi
+# yang menerima cursor). Versi yang sudah dijalankan dicatat di tabel schema_migrations
+# sehingga setiap migrasi hanya berjalan sekali. DDL MySQL langsung di-commit, jadi
+# langkah dibuat idempoten (cek dulu sebelum ALTER) agar migrasi yang terhenti di
+# tengah jalan aman dijalankan ulang.
+#
+# Pemakaian:
+#   python migrations.py            # jalankan migrasi yang belum diterapkan
+#   python migrations.py --dry-run  # tampilkan migrasi tertunda + rencana query (EXPLAIN)
+#   python migrations.py --explain  # tampilkan rencana query dengan skema saat ini
+
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def column_type(cursor, table, column):
+    cursor.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def add_index(table, name, columns):
+    """Langkah migrasi: buat index jika tabel ada dan index belum ada."""
+    sql = f"ALTER TABLE `{table}` ADD INDEX `{name}` ({', '.join(f'`{c}`' for c in columns)})"
+
+    def step(cursor):
+        if not table_exists(cursor, table) or index_exists(cursor, table, name):
+            return
+        cursor.execute(sql)
+    step.sql = sql
+    step.index = (table, name, tuple(columns))
+    return step
+
+
+def modify_column(table, column, definition, unless_type):
+    """Langkah migrasi: ubah tipe kolom kecuali tipenya sudah `unless_type`."""
+    sql = f"ALTER TABLE `{table}` MODIFY COLUMN `{column}` {definition}"
+
+    def step(cursor):
+        if not table_exists(cursor, table):
+            return
+        current = column_type(cursor, table, column)
+        if current is None or current == unless_type:
+            return
+        cursor.execute(sql)
+    step.sql = sql
+    return step
+
+
+def merge_tmp_into_data(cursor):
+    """
+    Pindahkan baris tabel tmp (data yang belum terkirim) ke tabel data lalu hapus tmp.
+    Baris yang (device, date)-nya sudah ada di data dilewati, jadi aman diulang.
+    """
+    if not table_exists(cursor, "tmp") or not table_exists(cursor, "data"):
+        return
+    cursor.execute("""
+        SELECT t.column_name FROM information_schema.columns t
+        JOIN information_schema.columns d
+          ON d.table_schema = t.table_schema AND d.table_name = 'data' AND d.column_name = t.column_name
+        WHERE t.table_schema = DATABASE() AND t.table_name = 'tmp' AND t.column_name <> 'id'
+        ORDER BY t.ordinal_position
+    """)
+    columns = ", ".join(f"`{row[0]}`" for row in cursor.fetchall())
+    cursor.execute(f"""
+        INSERT INTO data ({columns})
+        SELECT {columns} FROM tmp t
+        WHERE NOT EXISTS (SELECT 1 FROM data d WHERE d.device <=> t.device AND d.date = t.date)
+    """)
+    print(f"[MIGRASI] {cursor.rowcount} baris tmp dipindahkan ke data.")
+    cursor.execute("DROP TABLE tmp")
+merge_tmp_into_data.sql = "INSERT INTO data (...) SELECT ... FROM tmp WHERE NOT EXISTS (...); DROP TABLE tmp"
+
+
+def partition_data(cursor):
+    """Partisi tabel data per bulan (lihat partitions.py)."""
+    if table_exists(cursor, "data"):
+        partition_by_month(cursor, "data")
+partition_data.sql = "ALTER TABLE data ADD PRIMARY KEY (id, date); ALTER TABLE data PARTITION BY RANGE COLUMNS(date) (p_old, pYYYYMM, ..., p_future)"
+
+
+# (versi, nama, [langkah, ...])
+MIGRATIONS = [
+    (1, "device_status_varchar", [
+        # TEXT tidak bisa di-index tanpa prefix; nilai device/status selalu pendek
+        modify_column("data", "device", "VARCHAR(64)", "varchar"),
+        modify_column("tmp", "device", "VARCHAR(64)", "varchar"),
+        modify_column("data", "status", "VARCHAR(32)", "varchar"),
+        modify_column("tmp", "status", "VARCHAR(32)", "varchar"),
+    ]),
+    (2, "index_date", [
+        add_index("data", "idx_date", ["date"]),
+        add_index("tmp", "idx_date", ["date"]),
+    ]),
+    (3, "index_status_date", [
+        add_index("tmp", "idx_status_date", ["status", "date"]),
+        add_index("data", "idx_status_date", ["status", "date"]),
+    ]),
+    (4, "index_has", [
+        add_index("data", "idx_has", ["has"]),
+        add_index("tmp", "idx_has", ["has"]),
+    ]),
+    (5, "merge_tmp_into_data", [
+        merge_tmp_into_data,
+    ]),
+    (6, "partition_data_by_month", [
+        partition_data,
+    ]),
+    (7, "rollup_tables", [
+        rollups.create_tables,
+        rollups.backfill,
+    ]),
+]
+
+# Query yang sering dijalankan service lain, untuk mode --dry-run / --explain
+HOT_QUERIES = [
+    ("/api/history, /api/export", "SELECT date, pH FROM data WHERE date >= NOW() - INTERVAL 1 DAY ORDER BY date", "data", "date"),
+    ("/api/history (rollup)", "SELECT bucket, vsum, vcount FROM rollup_hour WHERE param = 'temp' AND bucket >= NOW() - INTERVAL 7 DAY", "rollup_hour", "param"),
+    ("/api/latest", "SELECT * FROM data ORDER BY date DESC LIMIT 1", "data", "date"),
+    ("backup.optimize_database", "SELECT id FROM data WHERE date < NOW() - INTERVAL 396 DAY", "data", "date"),
+    ("klhk/send.py", "SELECT date FROM data WHERE status IS NULL AND date < NOW()", "data", "status"),
+    ("klhk/retry.py", "SELECT date FROM data WHERE status = 'retry' AND date < NOW()", "data", "status"),
+    ("hasSend.py", "SELECT id FROM data WHERE has = '0'", "data", "has"),
+]
+
+
+def ensure_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(128) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migrations(cursor):
+    done = applied_versions(cursor)
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def step_sql(step):
+    return step if isinstance(step, str) else getattr(step, "sql", step.__name__)
+
+
+def explain(cursor, pending=()):
+    """
+    Cetak rencana eksekusi HOT_QUERIES. Query yang masih full scan ditandai beserta
+    index dari migrasi tertunda yang akan dipakainya.
+    """
+    planned = [step.index for _, _, steps in pending for step in steps if hasattr(step, "index")]
+    print("\n=== RENCANA QUERY (EXPLAIN) ===")
+    for source, query, table, column in HOT_QUERIES:
+        if not table_exists(cursor, table):
+            print(f"→ {source}: tabel {table} belum ada")
+            continue
+        cursor.execute("EXPLAIN " + query)
+        names = [d[0] for d in cursor.description]
+        plans = [dict(zip(names, row)) for row in cursor.fetchall()]
+        plan = plans[0] if plans else {}
+        access, key, rows = plan.get("type"), plan.get("key"), plan.get("rows")
+        print(f"→ {source}: type={access}, key={key}, rows={rows}")
+        if access == "ALL" or key is None:
+            candidates = [name for t, name, cols in planned if t == table and cols[0] == column]
+            if candidates:
+                print(f"   ⚠️ full scan, akan memakai {', '.join(candidates)} setelah migrasi")
+            else:
+                print("   ⚠️ full scan")
+    print("===============================\n")
+
+
+def migrate(dry_run=False):
+    """
+    Jalankan semua migrasi yang belum diterapkan, berurutan berdasarkan versi.
+
+    Return:
+        bool: True jika skema sudah mutakhir (atau dry-run selesai)
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            if dry_run and not table_exists(cursor, "schema_migrations"):
+                pending = list(MIGRATIONS)
+            else:
+                ensure_table(cursor)
+                pending = sorted(pending_migrations(cursor), key=lambda m: m[0])
+
+            if not pending:
+                print("[MIGRASI] ✅ Skema database sudah versi terbaru.")
+            for version, name, steps in pending:
+                if dry_run:
+                    print(f"[MIGRASI] (dry-run) {version:03d} {name}")
+                    for step in steps:
+                        print(f"           {step_sql(step)}")
+                    continue
+
+                print(f"[MIGRASI] ⏳ Menerapkan {version:03d} {name}...")
+                for step in steps:
+                    if isinstance(step, str):
+                        cursor.execute(step)
+                    else:
+                        step(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)",
+                    (version, name, datetime.now())
+                )
+                conn.commit()
+                print(f"[MIGRASI] ✅ {version:03d} {name} diterapkan.")
+
+            if dry_run:
+                explain(cursor, pending)
+            cursor.close()
+        return True
+
+    except Exception as e:
+        print(f"[MIGRASI] ❌ Gagal menjalankan migrasi: {e}")
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrasi skema database logger.")
+    parser.add_argument("--dry-run", action="store_true", help="Tampilkan migrasi tertunda dan rencana query tanpa mengubah skema")
+    parser.add_argument("--explain", action="store_true", help="Tampilkan rencana query dengan skema saat ini")
+    args = parser.parse_args()
+
+    if args.explain:
+        with connection() as conn:
+            cursor = conn.cursor()
+            explain(cursor)
+            cursor.close()
+        return
+    migrate(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
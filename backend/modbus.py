@@ -0,0 +1,150 @@
+import struct
+
+# Utilitas Modbus RTU yang dipakai bersama oleh driver sensor serial.
+
+# Batas jumlah register per request fungsi 0x03/0x04 menurut spesifikasi Modbus
+MAX_REGISTERS = 125
+
+# dtype -> (kode struct, jumlah register)
+DTYPES = {
+    'int16': ('h', 1),
+    'uint16': ('H', 1),
+    'int32': ('i', 2),
+    'uint32': ('I', 2),
+    'float32': ('f', 2),
+}
+
+# Urutan byte relatif terhadap big-endian (ABCD) untuk nilai 4 byte dan 2 byte
+BYTEORDERS = {
+    'ABCD': ((0, 1, 2, 3), (0, 1)),
+    'CDAB': ((2, 3, 0, 1), (0, 1)),
+    'BADC': ((1, 0, 3, 2), (1, 0)),
+    'DCBA': ((3, 2, 1, 0), (1, 0)),
+}
+
+
+def _build_crc_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+# Tabel CRC16/Modbus (polinomial 0xA001) dihitung sekali saat import
+CRC_TABLE = _build_crc_table()
+
+
+def crc16(data):
+    """Hitung CRC16/Modbus berbasis tabel dan kembalikan 2 byte (low byte dulu)."""
+    crc = 0xFFFF
+    table = CRC_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return bytes((crc & 0xFF, crc >> 8))
+
+
+def build_read_request(slave, function, address, count):
+    """Susun frame request baca register lengkap dengan CRC."""
+    pdu = struct.pack('>BBHH', slave, function, address, count)
+    return pdu + crc16(pdu)
+
+
+def group_registers(registers, max_gap=32, max_span=MAX_REGISTERS):
+    """
+    Kelompokkan register yang berdekatan menjadi blok baca sesedikit mungkin.
+
+    Argumen:
+        registers (list): daftar (nama, alamat, jumlah_register)
+        max_gap (int): jarak maksimum (register) antar nilai dalam satu blok
+        max_span (int): panjang maksimum satu blok (register)
+
+    Return:
+        list: daftar (alamat_awal, jumlah_register, [(nama, alamat, jumlah), ...])
+    """
+    max_span = min(max_span, MAX_REGISTERS)
+    blocks = []
+    for item in sorted(registers, key=lambda r: r[1]):
+        _, address, count = item
+        if blocks:
+            start, end, items = blocks[-1]
+            if address - end <= max_gap and address + count - start <= max_span:
+                blocks[-1] = (start, max(end, address + count), items + [item])
+                continue
+        blocks.append((address, address + count, [item]))
+    return [(start, end - start, items) for start, end, items in blocks]
+
+
+class ModbusError(Exception):
+    """Respons Modbus tidak ada, tidak lengkap, CRC salah, atau berupa exception."""
+
+
+# Toleransi minimum jeda antar frame di Linux (UART FIFO dan penjadwalan kernel
+# bisa menahan byte beberapa milidetik walau secara wire frame belum selesai)
+MIN_FRAME_GAP = 0.005
+
+
+def inter_frame_gap(baudrate):
+    """Jeda 3.5 karakter (11 bit per karakter) untuk baudrate tertentu, dalam detik."""
+    if baudrate > 19200:
+        gap = 0.00175  # Nilai tetap dari spesifikasi Modbus RTU untuk baud > 19200
+    else:
+        gap = 3.5 * 11 / baudrate
+    return max(gap, MIN_FRAME_GAP)
+
+
+def expected_length(function, count):
+    """Panjang frame respons normal (termasuk CRC) untuk fungsi dan jumlah register/coil."""
+    if function in (0x01, 0x02):
+        return 5 + (count + 7) // 8
+    if function in (0x03, 0x04):
+        return 5 + 2 * count
+    if function in (0x05, 0x06, 0x0F, 0x10):
+        return 8
+    raise ValueError(f"Fungsi Modbus 0x{function:02X} tidak didukung")
+
+
+def transact(ser, request, timeout=1.0):
+    """
+    Kirim satu request RTU dan baca respons berdasarkan panjang frame.
+
+    Pembacaan selesai begitu frame lengkap diterima, atau ketika jeda antar byte
+    melebihi 3.5 karakter (misalnya respons exception yang lebih pendek).
+    Respons divalidasi (slave, fungsi, byte count, CRC) sebelum dikembalikan.
+
+    Raise:
+        ModbusError: jika tidak ada respons, frame tidak lengkap, CRC salah,
+        atau perangkat membalas dengan exception.
+    """
+    slave, function = request[0], request[1]
+    count = struct.unpack('>H', request[4:6])[0]
+    expected = expected_length(function, count)
+
+    # Setter pyserial mengkonfigurasi ulang port, jadi hanya diubah jika berbeda
+    gap = inter_frame_gap(ser.baudrate)
+    if ser.timeout != timeout:
+        ser.timeout = timeout
+    if ser.inter_byte_timeout != gap:
+        ser.inter_byte_timeout = gap
+    ser.write(request)
+    response = ser.read(expected)
+
+    if not response:
+        raise ModbusError("tidak ada respons")
+    if len(response) >= 5 and response[1] == (function | 0x80):
+        if crc16(response[:3]) == response[3:5]:
+            raise ModbusError(f"exception code 0x{response[2]:02X} dari slave {slave}")
+    if len(response) < expected:
+        raise ModbusError(f"respons tidak lengkap ({len(response)}/{expected} byte)")
+    if crc16(response[:-2]) != response[-2:]:
+        raise ModbusError("CRC respons tidak valid")
+    if response[0] != slave or response[1] != function:
+        raise ModbusError(f"respons dari slave/fungsi yang salah: {response[:2].hex()}")
+    if function in (0x03, 0x04) and response[2] != 2 * count:
+        raise ModbusError(f"byte count tidak sesuai ({response[2]} != {2 * count})")
+    return response
@@ -0,0 +1,148 @@
+import os
+from datetime import datetime
+from db import connection
+
+# Partisi bulanan untuk tabel data (RANGE COLUMNS pada kolom date).
+#
+# - pYYYYMM  : data bulan YYYY-MM
+# - p_old    : data yang lebih lama dari partisi bulanan pertama
+# - p_future : penampung data setelah partisi bulanan terakhir (MAXVALUE)
+#
+# Partisi bulan-bulan berikutnya dibuat lebih awal (PARTITION_MONTHS_AHEAD) dengan
+# memecah p_future, dan retensi dilakukan dengan DROP PARTITION sehingga menghapus satu
+# bulan data tidak memerlukan DELETE baris per baris.
+
+TABLE = "data"
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+RETENTION_MONTHS = int(os.getenv('RETENTION_MONTHS', '13'))
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    year, month = divmod(value.month - 1 + months, 12)
+    return datetime(value.year + year, month + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_clause(month):
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d %H:%M:%S}')"
+
+
+def list_partitions(cursor, table=TABLE):
+    """Return list (nama, batas_atas datetime | None untuk MAXVALUE) urut sesuai partisi."""
+    cursor.execute("""
+        SELECT partition_name, partition_description FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    """, (table,))
+    result = []
+    for name, description in cursor.fetchall():
+        bound = None
+        if description and description.upper() != "MAXVALUE":
+            bound = datetime.strptime(description.strip("'")[:19], "%Y-%m-%d %H:%M:%S")
+        result.append((name, bound))
+    return result
+
+
+def is_partitioned(cursor, table=TABLE):
+    return bool(list_partitions(cursor, table))
+
+
+def partition_by_month(cursor, table=TABLE, months_ahead=PARTITION_MONTHS_AHEAD, retention=RETENTION_MONTHS):
+    """
+    Ubah tabel biasa menjadi tabel berpartisi bulanan (dipakai oleh migrasi 006).
+
+    MySQL mensyaratkan kolom partisi ada di setiap unique key, jadi primary key
+    menjadi (id, date) dan date wajib NOT NULL.
+    """
+    if is_partitioned(cursor, table):
+        return
+    cursor.execute(f"UPDATE `{table}` SET `date` = FROM_UNIXTIME(`datetime`) WHERE `date` IS NULL")
+    cursor.execute(f"ALTER TABLE `{table}` MODIFY `date` DATETIME NOT NULL")
+    cursor.execute(f"ALTER TABLE `{table}` DROP PRIMARY KEY, ADD PRIMARY KEY (id, `date`)")
+
+    now = month_start(datetime.now())
+    cursor.execute(f"SELECT MIN(`date`) FROM `{table}`")
+    oldest = cursor.fetchone()[0]
+    # Data yang sudah lewat masa retensi cukup masuk p_old, tidak perlu partisi sendiri
+    first = max(month_start(oldest) if oldest else now, add_months(now, -retention))
+
+    months = []
+    month = first
+    while month <= add_months(now, months_ahead):
+        months.append(month)
+        month = add_months(month, 1)
+
+    clauses = [f"PARTITION p_old VALUES LESS THAN ('{first:%Y-%m-%d %H:%M:%S}')"]
+    clauses += [partition_clause(m) for m in months]
+    clauses.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    cursor.execute(f"ALTER TABLE `{table}` PARTITION BY RANGE COLUMNS(`date`) ({', '.join(clauses)})")
+    print(f"[PARTISI] ✅ Tabel {table} dipartisi per bulan ({len(months)} partisi bulanan).")
+
+
+def ensure_partitions(cursor, table=TABLE, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Buat partisi bulan ini sampai `months_ahead` bulan ke depan. Return jumlah partisi baru."""
+    parts = list_partitions(cursor, table)
+    bounds = [bound for _, bound in parts if bound is not None]
+    if not parts or not bounds:
+        return 0
+
+    # Bulan berikutnya setelah partisi bulanan terakhir
+    month = bounds[-1]
+    target = add_months(month_start(datetime.now()), months_ahead)
+    months = []
+    while month <= target:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return 0
+
+    clauses = [partition_clause(m) for m in months]
+    clauses.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    cursor.execute(f"ALTER TABLE `{table}` REORGANIZE PARTITION p_future INTO ({', '.join(clauses)})")
+    print(f"[PARTISI] ➕ Partisi baru: {', '.join(partition_name(m) for m in months)}")
+    return len(months)
+
+
+def expired_partitions(cursor, table=TABLE, retention=RETENTION_MONTHS):
+    """Partisi yang seluruh isinya lebih lama dari `retention` bulan."""
+    cutoff = add_months(month_start(datetime.now()), -retention)
+    return [name for name, bound in list_partitions(cursor, table) if bound is not None and bound <= cutoff]
+
+
+def drop_expired(cursor, table=TABLE, retention=RETENTION_MONTHS):
+    """Hapus partisi kedaluwarsa dengan DROP PARTITION. Return nama partisi yang dihapus."""
+    expired = expired_partitions(cursor, table, retention)
+    if expired:
+        cursor.execute(f"ALTER TABLE `{table}` DROP PARTITION {', '.join(expired)}")
+        print(f"[PARTISI] 🧹 Partisi dihapus (lebih dari {retention} bulan): {', '.join(expired)}")
+    return expired
+
+
+def maintain(drop=True):
+    """
+    Perawatan partisi: buat partisi mendatang dan (opsional) hapus partisi kedaluwarsa.
+
+    Return:
+        bool: False jika tabel belum berpartisi atau database gagal
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            if not is_partitioned(cursor):
+                cursor.close()
+                return False
+            ensure_partitions(cursor)
+            if drop:
+                drop_expired(cursor)
+            cursor.close()
+        return True
+    except Exception as e:
+        print(f"[PARTISI] ❌ Gagal merawat partisi: {e}")
+        return False
@@ -0,0 +1,87 @@
+import argparse
+import time
+from db import connection as mysql_connection
+from migrations import table_exists
+import pgstore
+
+# Pindahkan isi tabel MySQL (data, dan tmp versi lama jika masih ada) ke PostgreSQL.
+#
+# Baris dibaca bertahap per --chunk baris (keyset pada id, tanpa OFFSET) dan setiap
+# chunk dimasukkan dengan COPY lalu di-commit, jadi memori tetap kecil dan proses yang
+# terhenti bisa dijalankan ulang: baris (device, date) yang sudah ada dilewati.
+#
+# Pemakaian:
+#   python pg_migrate.py                 # data + tmp, 5000 baris per chunk
+#   python pg_migrate.py --chunk 20000 --table data
+
+
+def source_columns(cursor, table):
+    """Kolom tabel MySQL yang juga ada di tabel data PostgreSQL (tanpa id)."""
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY ordinal_position
+    """, (table,))
+    wanted = {c.lower() for c in pgstore.COLUMNS}
+    return [row[0] for row in cursor.fetchall() if row[0].lower() in wanted]
+
+
+def migrate_table(table, chunk):
+    """
+    Salin satu tabel MySQL ke PostgreSQL per chunk.
+
+    Return:
+        (int, int): (baris dibaca, baris baru di PostgreSQL)
+    """
+    with mysql_connection() as src:
+        cursor = src.cursor()
+        if not table_exists(cursor, table):
+            print(f"[PG] ℹ️ Tabel {table} tidak ada, dilewati.")
+            cursor.close()
+            return 0, 0
+        columns = source_columns(cursor, table)
+        fields = ", ".join(f"`{c}`" for c in columns)
+
+        total = inserted = 0
+        last_id = 0
+        started = time.monotonic()
+        while True:
+            cursor.execute(
+                f"SELECT id, {fields} FROM `{table}` WHERE id > %s AND `date` IS NOT NULL ORDER BY id LIMIT %s",
+                (last_id, chunk)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            with pgstore.connection() as dst:
+                with dst.cursor() as pg:
+                    inserted += pgstore.copy_rows(pg, [c.lower() for c in columns], [row[1:] for row in rows])
+                dst.commit()
+            total += len(rows)
+            rate = total / max(time.monotonic() - started, 1e-6)
+            print(f"[PG] {table}: {total} baris dibaca, {inserted} baru (id <= {last_id}, {rate:.0f} baris/detik)")
+        cursor.close()
+    return total, inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrasi data MySQL ke PostgreSQL/TimescaleDB.")
+    parser.add_argument("--chunk", type=int, default=5000, help="Jumlah baris per chunk (default 5000)")
+    parser.add_argument("--table", action="append", choices=["data", "tmp"], help="Tabel sumber (default data dan tmp)")
+    args = parser.parse_args()
+
+    with pgstore.connection() as conn:
+        with conn.cursor() as cursor:
+            pgstore.ensure_schema(cursor)
+            timescale = pgstore.has_timescale(cursor)
+        conn.commit()
+    print(f"[PG] ✅ Skema PostgreSQL siap ({'hypertable TimescaleDB' if timescale else 'tabel biasa'}).")
+
+    for table in args.table or ["data", "tmp"]:
+        total, inserted = migrate_table(table, args.chunk)
+        print(f"[PG] ✅ {table}: {total} baris dibaca, {inserted} baris baru, {total - inserted} sudah ada.")
+
+
+if __name__ == "__main__":
+    main()
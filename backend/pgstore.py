@@ -0,0 +1,147 @@
+import csv
+import io
+import os
+import threading
+from contextlib import contextmanager
+from psycopg2 import pool
+from rollups import PARAMS
+
+# Backend PostgreSQL (opsional TimescaleDB) untuk server pusat yang menampung banyak stasiun.
+#
+# - Insert massal memakai COPY ke tabel staging sementara, lalu INSERT ... ON CONFLICT
+#   DO NOTHING ke tabel data, jadi kiriman ulang spool tidak menimbulkan duplikasi.
+# - Jika ekstensi timescaledb terpasang, tabel data dijadikan hypertable (chunk per
+#   PG_CHUNK_INTERVAL), dikompresi per device setelah PG_COMPRESS_AFTER, dan agregasi
+#   grafik memakai time_bucket(); tanpa TimescaleDB dipakai date_trunc().
+#
+# Konfigurasi koneksi: PG_HOST, PG_PORT, PG_USER, PG_PASSWORD, PG_DATABASE.
+
+PG_CONFIG = {
+    'host': os.getenv('PG_HOST', 'localhost'),
+    'port': int(os.getenv('PG_PORT', '5432')),
+    'user': os.getenv('PG_USER'),
+    'password': os.getenv('PG_PASSWORD'),
+    'dbname': os.getenv('PG_DATABASE'),
+}
+PG_POOL_SIZE = int(os.getenv('PG_POOL_SIZE', '4'))
+PG_CHUNK_INTERVAL = os.getenv('PG_CHUNK_INTERVAL', '7 days')
+PG_COMPRESS_AFTER = os.getenv('PG_COMPRESS_AFTER', '30 days')
+
+# Kolom tabel data (urutan sama dengan config.COLUMNS, tanpa id)
+COLUMNS = ('device', 'date', 'datetime') + PARAMS + ('samples', 'stats', 'status', 'keterangan', 'dateterkirim', 'has')
+
+BUCKETS = {"hour": "1 hour", "day": "1 day"}
+
+_pool = None
+_pool_lock = threading.Lock()
+_timescale = None
+
+
+def quote(name):
+    """Nama kolom PostgreSQL (huruf kecil, dikutip: `do` adalah kata kunci)."""
+    return '"' + name.lower().replace('"', '') + '"'
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = pool.ThreadedConnectionPool(1, PG_POOL_SIZE, **PG_CONFIG)
+        return _pool
+
+
+@contextmanager
+def connection():
+    """Koneksi dari pool; commit dilakukan pemanggil, rollback jika terjadi error."""
+    conn = get_pool().getconn()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        get_pool().putconn(conn)
+
+
+def has_timescale(cursor):
+    global _timescale
+    if _timescale is None:
+        cursor.execute("SELECT COUNT(*) FROM pg_extension WHERE extname = 'timescaledb'")
+        _timescale = cursor.fetchone()[0] > 0
+    return _timescale
+
+
+def ensure_schema(cursor):
+    """Buat tabel data (dan hypertable + kompresi jika TimescaleDB tersedia). Idempoten."""
+    params = ",\n".join(f"                {quote(p)} REAL" for p in PARAMS)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS data (
+                id BIGSERIAL,
+                device VARCHAR(64) NOT NULL DEFAULT '',
+                "date" TIMESTAMP NOT NULL,
+                "datetime" BIGINT DEFAULT 0,
+{params},
+                samples INT DEFAULT 0,
+                stats TEXT,
+                status VARCHAR(32),
+                keterangan TEXT,
+                dateterkirim TIMESTAMP,
+                has INT DEFAULT 0,
+                PRIMARY KEY (id, "date")
+        )
+    """)
+    # Satu baris per (device, date); juga dipakai untuk query rentang per stasiun
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_device_date ON data (device, "date")')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_date ON data ("date")')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_status_date ON data (status, "date")')
+
+    if has_timescale(cursor):
+        cursor.execute(
+            "SELECT create_hypertable('data', 'date', chunk_time_interval => %s::interval, "
+            "if_not_exists => TRUE, migrate_data => TRUE)",
+            (PG_CHUNK_INTERVAL,)
+        )
+        cursor.execute("SELECT COUNT(*) FROM timescaledb_information.compression_settings WHERE hypertable_name = 'data'")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("ALTER TABLE data SET (timescaledb.compress, timescaledb.compress_segmentby = 'device', timescaledb.compress_orderby = 'date')")
+        cursor.execute("SELECT add_compression_policy('data', %s::interval, if_not_exists => TRUE)", (PG_COMPRESS_AFTER,))
+
+
+def copy_rows(cursor, columns, rows):
+    """
+    Masukkan banyak baris dengan COPY lewat tabel staging. Baris (device, date)
+    yang sudah ada dilewati.
+
+    Return:
+        int: jumlah baris baru
+    """
+    if not rows:
+        return 0
+    names = ", ".join(quote(c) for c in columns)
+    # Tanpa constraint: device NULL dari data lama baru diganti '' saat INSERT ke data
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS staging ON COMMIT DELETE ROWS AS SELECT * FROM data WITH NO DATA")
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        # Sel kosong tanpa kutip dibaca COPY CSV sebagai NULL
+        writer.writerow(["" if v is None else v for v in row])
+    buf.seek(0)
+    cursor.copy_expert(f"COPY staging ({names}) FROM STDIN WITH (FORMAT csv)", buf)
+
+    select = ", ".join("COALESCE(device, '')" if c == "device" else quote(c) for c in columns)
+    cursor.execute(f"""
+        INSERT INTO data ({names})
+        SELECT DISTINCT ON (device, "date") {select} FROM staging ORDER BY device, "date"
+        ON CONFLICT (device, "date") DO NOTHING
+    """)
+    inserted = cursor.rowcount
+    cursor.execute("TRUNCATE staging")
+    return inserted
+
+
+def bucket_expression(cursor, resolution):
+    width = BUCKETS[resolution]
+    if has_timescale(cursor):
+        return f"time_bucket('{width}', \"date\")"
+    return f"date_trunc('{resolution}', \"date\")"
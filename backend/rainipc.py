@@ -0,0 +1,244 @@
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Kanal IPC curah hujan antara daemon ARG314 (arg314.py) dan loop sensor (main.py).
+#
+# Daemon menghitung tipping di memori. Saat jendela DELAY ditutup, main.py meminta
+# akumulasi lewat Unix domain socket (RAIN_SOCKET) dengan perintah "take": daemon
+# mengembalikan jumlah tipping sejak take sebelumnya lalu mengosongkan hitungan,
+# beserta nomor urut (seq). Tidak ada sleep tetap dan tidak ada pencocokan timestamp.
+#
+# Take bersifat idempoten per jendela: jika main.py mengulang take untuk jendela yang
+# sama (misalnya balasan sebelumnya hilang karena timeout), daemon mengirim ulang
+# hasil yang sama tanpa mengambil tipping baru.
+#
+# SQLite (SQLITE_DB_PATH) hanya dipakai sebagai jurnal pemulihan crash: satu baris per
+# take, dan checkpoint tipping yang belum diambil paling sering setiap RAIN_CHECKPOINT detik.
+#
+# Protokol: satu baris JSON per permintaan dan balasan.
+#   -> {"op": "take", "window": "2025-01-01 10:05:00"}
+#   <- {"seq": 12, "window": "...", "tips": 3, "mm": 0.6, "since": "...", "until": "..."}
+#   -> {"op": "peek"}
+#   <- {"seq": 12, "tips": 1, "since": "..."}
+
+RAIN_SOCKET = os.getenv('RAIN_SOCKET', "/opt/logger/data/rain.sock")
+RAIN_JOURNAL = os.getenv("SQLITE_DB_PATH", "/opt/logger/data/gpio_logger.db")
+RAIN_TIMEOUT = float(os.getenv('RAIN_TIMEOUT', '2'))
+RAIN_CHECKPOINT = float(os.getenv('RAIN_CHECKPOINT', '30'))
+JOURNAL_KEEP = 10000
+
+
+def now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class RainAccumulator:
+    def __init__(self, resolution, journal_path=RAIN_JOURNAL):
+        self.resolution = resolution
+        self.lock = threading.Lock()
+        self.tips = 0
+        self.seq = 0
+        self.since = now_str()
+        self.last = None
+        self.checkpointed = 0
+        os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+        self.journal = sqlite3.connect(journal_path, check_same_thread=False)
+        self._restore()
+
+    # === Jurnal SQLite ===
+
+    def _restore(self):
+        """Pulihkan seq, take terakhir dan tipping yang belum diambil dari jurnal."""
+        cur = self.journal.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS rain_journal (
+                seq INTEGER PRIMARY KEY,
+                window TEXT,
+                tips INTEGER,
+                mm REAL,
+                since TEXT,
+                until TEXT
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS rain_pending (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                tips INTEGER,
+                since TEXT
+            )
+        """)
+        self.journal.commit()
+
+        cur.execute("SELECT seq, window, tips, mm, since, until FROM rain_journal ORDER BY seq DESC LIMIT 1")
+        row = cur.fetchone()
+        if row:
+            self.seq = row[0]
+            self.last = dict(zip(("seq", "window", "tips", "mm", "since", "until"), row))
+            self.since = row[5]
+        cur.execute("SELECT tips, since FROM rain_pending WHERE id = 1")
+        row = cur.fetchone()
+        if row and row[0]:
+            self.tips, self.since = row
+            self.checkpointed = self.tips
+            print(f"[RAIN] ♻️ {self.tips} tipping belum terambil dipulihkan dari jurnal (sejak {self.since}).")
+        cur.close()
+
+    def _save_pending(self, tips, since):
+        self.journal.execute(
+            "INSERT INTO rain_pending (id, tips, since) VALUES (1, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET tips = excluded.tips, since = excluded.since",
+            (tips, since)
+        )
+
+    def checkpoint(self):
+        """Simpan tipping yang belum diambil (hanya jika berubah)."""
+        with self.lock:
+            if self.tips == self.checkpointed:
+                return
+            self._save_pending(self.tips, self.since)
+            self.journal.commit()
+            self.checkpointed = self.tips
+
+    # === Operasi ===
+
+    def tip(self, count=1):
+        """Dipanggil dari callback GPIO."""
+        with self.lock:
+            self.tips += count
+            return self.tips
+
+    def take(self, window, tips=None):
+        """
+        Ambil akumulasi jendela `window`. Take berulang untuk jendela yang sama
+        mengembalikan hasil yang sama.
+
+        Argumen:
+            tips (int): ganti hitungan (mode demo)
+        """
+        with self.lock:
+            if self.last and self.last["window"] == window:
+                return dict(self.last, repeated=True)
+            if tips is not None:
+                self.tips = tips
+            until = now_str()
+            self.seq += 1
+            reply = {
+                "seq": self.seq,
+                "window": window,
+                "tips": self.tips,
+                "mm": round(self.tips * self.resolution, 3),
+                "since": self.since,
+                "until": until,
+            }
+            self.journal.execute(
+                "INSERT INTO rain_journal (seq, window, tips, mm, since, until) VALUES (?, ?, ?, ?, ?, ?)",
+                (reply["seq"], window, reply["tips"], reply["mm"], reply["since"], until)
+            )
+            self.journal.execute("DELETE FROM rain_journal WHERE seq <= ?", (self.seq - JOURNAL_KEEP,))
+            self._save_pending(0, until)
+            self.journal.commit()
+            self.tips = 0
+            self.checkpointed = 0
+            self.since = until
+            self.last = reply
+            return reply
+
+    def peek(self):
+        with self.lock:
+            return {"seq": self.seq, "tips": self.tips, "since": self.since}
+
+
+# === Server (di dalam daemon arg314.py) ===
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        accumulator = self.server.accumulator
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "take":
+                    reply = accumulator.take(str(request["window"]), self.server.demo_tips())
+                    print(f"[RAIN] 📤 seq {reply['seq']} jendela {reply['window']}: {reply['tips']} tipping = {reply['mm']} mm"
+                          + (" (ulang)" if reply.get("repeated") else ""))
+                elif op == "peek":
+                    reply = accumulator.peek()
+                else:
+                    reply = {"error": f"op tidak dikenal: {op}"}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class RainServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, accumulator, path=RAIN_SOCKET, demo=None):
+        """
+        Argumen:
+            demo (callable): jika diisi, menghasilkan jumlah tipping acak untuk setiap take
+        """
+        self.accumulator = accumulator
+        self.demo = demo
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)  # socket sisa proses sebelumnya
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+    def demo_tips(self):
+        return self.demo() if self.demo else None
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name="rain-ipc", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# === Client (dipakai main.py) ===
+
+def request(message, path=RAIN_SOCKET, timeout=RAIN_TIMEOUT):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps(message) + "\n").encode())
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    reply = json.loads(data)
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return reply
+
+
+def take(window, path=RAIN_SOCKET, timeout=RAIN_TIMEOUT, retries=1):
+    """
+    Ambil curah hujan jendela `window` dari daemon ARG314.
+
+    Return:
+        dict | None: balasan take, atau None jika daemon tidak bisa dihubungi
+    """
+    for attempt in range(retries + 1):
+        try:
+            return request({"op": "take", "window": window}, path, timeout)
+        except (OSError, ValueError, RuntimeError) as e:
+            if attempt == retries:
+                print(f"[RAIN] ⚠️ Daemon ARG314 tidak bisa dihubungi ({path}): {e}")
+                return None
+            time.sleep(0.1)
@@ -0,0 +1,210 @@
+import math
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+env_path = "/opt/logger/config/env"  # env file path
+if not load_dotenv(dotenv_path=env_path):
+    print(f"Error: env file not found at {env_path}")
+    exit(1)
+
+# Tabel rollup per jam dan per hari untuk grafik rentang panjang.
+#
+# Format panjang: satu baris per (device, bucket, param) berisi min/max/sum/count dan
+# nilai terakhir, sehingga rata-rata = vsum / vcount dan parameter baru tidak perlu
+# ALTER TABLE. Rollup diperbarui secara inkremental di transaksi yang sama dengan
+# INSERT ke tabel data (config.write_rows), dan diisi ulang dari tabel data oleh
+# migrasi 007 (backfill).
+#
+# Arah angin tidak bisa dirata-rata langsung (359° dan 1° rata-ratanya bukan 180°),
+# jadi disimpan juga sebagai jumlah vektor satuan wdir_x (cos) dan wdir_y (sin).
+
+LEVELS = {
+    # level: (tabel, format bucket DATE_FORMAT, format bucket Python, lebar bucket menit)
+    "hour": ("rollup_hour", "%Y-%m-%d %H:00:00", "%Y-%m-%d %H:00:00", 60),
+    "day": ("rollup_day", "%Y-%m-%d 00:00:00", "%Y-%m-%d 00:00:00", 1440),
+}
+
+PARAMS = (
+    'ph', 'orp', 'tds', 'conduct', 'do', 'salinity', 'nh3n', 'battery', 'depth', 'flow', 'tflow',
+    'turb', 'tss', 'cod', 'bod', 'no3', 'temp', 'press', 'hum', 'wspeed', 'wdir', 'rain', 'srad',
+)
+
+# Rentang sampai ROLLUP_RAW_HOURS dibaca dari data mentah, sampai ROLLUP_HOUR_DAYS
+# dari rollup_hour, selebihnya dari rollup_day
+ROLLUP_RAW_HOURS = float(os.getenv('ROLLUP_RAW_HOURS', '24'))
+ROLLUP_HOUR_DAYS = float(os.getenv('ROLLUP_HOUR_DAYS', '31'))
+
+UPSERT_QUERY = """
+    INSERT INTO {table} (device, bucket, param, vmin, vmax, vsum, vcount, vlast, last_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        vlast = IF(VALUES(last_at) >= last_at, VALUES(vlast), vlast),
+        last_at = GREATEST(last_at, VALUES(last_at)),
+        vmin = LEAST(vmin, VALUES(vmin)),
+        vmax = GREATEST(vmax, VALUES(vmax)),
+        vsum = vsum + VALUES(vsum),
+        vcount = vcount + VALUES(vcount)
+"""
+
+
+def resolution_for(start, end=None):
+    """Pilih sumber data untuk rentang [start, end]: 'raw', 'hour' atau 'day'."""
+    span = (end or datetime.now()) - start
+    if span <= timedelta(hours=ROLLUP_RAW_HOURS):
+        return "raw"
+    if span <= timedelta(days=ROLLUP_HOUR_DAYS):
+        return "hour"
+    return "day"
+
+
+def step_minutes(resolution):
+    return LEVELS[resolution][3] if resolution in LEVELS else 0
+
+
+def bucket_start(at, resolution):
+    """Awal bucket yang memuat waktu `at` (untuk resolusi raw: `at` itu sendiri)."""
+    if resolution not in LEVELS:
+        return at
+    return datetime.strptime(at.strftime(LEVELS[resolution][2]), "%Y-%m-%d %H:%M:%S")
+
+
+# === Skema dan backfill (dipakai migrasi 007) ===
+
+def create_tables(cursor):
+    for table, _, _, _ in LEVELS.values():
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                device VARCHAR(64) NOT NULL DEFAULT '',
+                bucket DATETIME NOT NULL,
+                param VARCHAR(16) NOT NULL,
+                vmin DOUBLE,
+                vmax DOUBLE,
+                vsum DOUBLE NOT NULL DEFAULT 0,
+                vcount INT NOT NULL DEFAULT 0,
+                vlast DOUBLE,
+                last_at DATETIME NOT NULL,
+                PRIMARY KEY (param, bucket, device)
+            )
+        """)
+create_tables.sql = "CREATE TABLE rollup_hour / rollup_day (device, bucket, param, vmin, vmax, vsum, vcount, vlast, last_at)"
+
+
+def source_expressions():
+    """(nama param rollup, ekspresi SQL atas tabel data)."""
+    exprs = [(param, f"`{param}`") for param in PARAMS]
+    exprs.append(("wdir_x", "COS(RADIANS(`wdir`))"))
+    exprs.append(("wdir_y", "SIN(RADIANS(`wdir`))"))
+    return exprs
+
+
+def backfill(cursor):
+    """Isi ulang rollup dari seluruh tabel data. Tabel dikosongkan dulu, jadi aman diulang."""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = 'data'
+    """)
+    if cursor.fetchone()[0] == 0:
+        return
+    for level, (table, sql_format, _, _) in LEVELS.items():
+        cursor.execute(f"DELETE FROM {table}")
+        total = 0
+        for param, expr in source_expressions():
+            cursor.execute(f"""
+                INSERT INTO {table} (device, bucket, param, vmin, vmax, vsum, vcount, vlast, last_at)
+                SELECT IFNULL(device, ''), DATE_FORMAT(`date`, %s) AS b, %s,
+                       MIN({expr}), MAX({expr}), SUM({expr}), COUNT({expr}),
+                       SUBSTRING_INDEX(GROUP_CONCAT({expr} ORDER BY `date` DESC), ',', 1) + 0,
+                       MAX(`date`)
+                FROM data
+                WHERE `date` IS NOT NULL AND {expr} IS NOT NULL
+                GROUP BY IFNULL(device, ''), b
+            """, (sql_format, param))
+            total += cursor.rowcount
+        print(f"[ROLLUP] {total} baris {table} diisi dari tabel data.")
+backfill.sql = "DELETE FROM rollup_*; INSERT INTO rollup_* SELECT ... FROM data GROUP BY device, bucket (per param)"
+
+
+# === Pembaruan inkremental ===
+
+def aggregate(rows):
+    """
+    Kelompokkan baris (dict kolom data) per level dan (device, bucket, param).
+
+    Return:
+        dict: level -> OrderedDict {(device, bucket, param): [min, max, sum, count, last, last_at]}
+    """
+    result = {level: OrderedDict() for level in LEVELS}
+    for row in rows:
+        date = str(row["date"])[:19]
+        at = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+        values = [(param, row.get(param)) for param in PARAMS]
+        wdir = row.get("wdir")
+        if wdir is not None:
+            values.append(("wdir_x", math.cos(math.radians(wdir))))
+            values.append(("wdir_y", math.sin(math.radians(wdir))))
+
+        for level, (_, _, py_format, _) in LEVELS.items():
+            bucket = at.strftime(py_format)
+            groups = result[level]
+            for param, value in values:
+                if value is None:
+                    continue
+                key = (row.get("device") or "", bucket, param)
+                agg = groups.get(key)
+                if agg is None:
+                    groups[key] = [value, value, value, 1, value, at]
+                    continue
+                agg[0] = min(agg[0], value)
+                agg[1] = max(agg[1], value)
+                agg[2] += value
+                agg[3] += 1
+                if at >= agg[5]:
+                    agg[4], agg[5] = value, at
+    return result
+
+
+def update(cursor, rows):
+    """Tambahkan baris baru ke rollup_hour dan rollup_day (tanpa commit)."""
+    if not rows:
+        return
+    for level, groups in aggregate(rows).items():
+        table = LEVELS[level][0]
+        cursor.executemany(
+            UPSERT_QUERY.format(table=table),
+            [(device, bucket, param, *agg) for (device, bucket, param), agg in groups.items()]
+        )
+
+
+# === Query untuk API ===
+
+def history_query(resolution, count=1):
+    """
+    SQL (bucket, param, avg, min, max) untuk `count` param dari tabel rollup,
+    parameter: (param_1, ..., param_count, start).
+    """
+    table = LEVELS[resolution][0]
+    return f"""
+        SELECT bucket AS date, param, SUM(vsum) / SUM(vcount) AS `avg`, MIN(vmin) AS `min`, MAX(vmax) AS `max`
+        FROM {table}
+        WHERE param IN ({", ".join(["%s"] * count)}) AND bucket >= %s
+        GROUP BY bucket, param
+        ORDER BY bucket ASC
+    """
+
+
+def wind_query(resolution):
+    """SQL (bucket, wspeed rata-rata, wdir rata-rata vektor) dari tabel rollup, parameter: (start,)."""
+    table = LEVELS[resolution][0]
+    return f"""
+        SELECT bucket AS date,
+               SUM(IF(param = 'wspeed', vsum, 0)) / NULLIF(SUM(IF(param = 'wspeed', vcount, 0)), 0) AS wspeed,
+               CASE WHEN SUM(IF(param = 'wdir_x', vcount, 0)) > 0 THEN
+                   MOD(DEGREES(ATAN2(SUM(IF(param = 'wdir_y', vsum, 0)), SUM(IF(param = 'wdir_x', vsum, 0)))) + 360, 360)
+               END AS wdir
+        FROM {table}
+        WHERE param IN ('wspeed', 'wdir_x', 'wdir_y') AND bucket >= %s
+        GROUP BY bucket
+        ORDER BY bucket ASC
+    """
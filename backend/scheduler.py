@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timedelta
+
+# Scheduler tick untuk loop sensor.
+# Tick disejajarkan dengan jam dinding (kelipatan interval sejak awal jam, sama seperti
+# aturan lama `minute % DELAY == 0 and second == 0`), tetapi penantian memakai jam
+# monotonic sehingga proses benar-benar tidur di antara tick.
+
+# Bangun paling lambat tiap RESYNC detik untuk mengoreksi lompatan jam sistem (NTP)
+RESYNC = 30
+
+
+class TickScheduler:
+    def __init__(self, interval_seconds, tz, grace=None):
+        """
+        Argumen:
+            interval_seconds (int): jarak antar tick (detik)
+            tz: timezone pytz untuk penjajaran tick
+            grace (float): keterlambatan maksimum (detik) agar tick yang terlewat
+                masih dijalankan; default setengah interval
+        """
+        if interval_seconds <= 0:
+            raise ValueError("Interval scheduler harus lebih dari 0 detik")
+        self.interval = interval_seconds
+        self.tz = tz
+        self.grace = interval_seconds / 2 if grace is None else grace
+        self.last_tick = None
+        self.overruns = 0
+        self.skipped = 0
+
+    def now(self):
+        return datetime.now(self.tz)
+
+    def next_tick(self, after):
+        """Tick terjajar pertama yang lebih besar dari `after`."""
+        hour_start = after.replace(minute=0, second=0, microsecond=0)
+        elapsed = (after - hour_start).total_seconds()
+        offset = (int(elapsed // self.interval) + 1) * self.interval
+        if offset >= 3600:
+            offset = 3600
+        return self.tz.normalize(hour_start + timedelta(seconds=offset))
+
+    def _sleep_until(self, tick):
+        target = time.monotonic() + (tick - self.now()).total_seconds()
+        while True:
+            remaining = target - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, RESYNC))
+            # Koreksi target jika jam dinding bergeser terhadap jam monotonic
+            drift = (tick - self.now()).total_seconds() - (target - time.monotonic())
+            if abs(drift) > 1:
+                target += drift
+
+    def wait(self):
+        """
+        Tidur sampai tick berikutnya dan kembalikan waktu tick terjadwal (datetime).
+
+        Jika siklus sebelumnya berjalan melewati tick berikutnya (overrun), tick itu
+        tetap dijalankan bila keterlambatannya masih dalam batas `grace`; jika tidak,
+        tick-tick yang terlewat dilaporkan lalu scheduler melompat ke tick berikutnya.
+        """
+        now = self.now()
+        if self.last_tick is None:
+            tick = self.next_tick(now)
+        else:
+            tick = self.next_tick(self.last_tick)
+            if tick <= now:
+                self.overruns += 1
+                late = (now - tick).total_seconds()
+                if late > self.grace:
+                    upcoming = self.next_tick(now)
+                    missed = 0
+                    t = tick
+                    while t < upcoming:
+                        missed += 1
+                        t = self.next_tick(t)
+                    self.skipped += missed
+                    print(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] ⚠️ Overrun: siklus terlambat {late:.1f} detik, "
+                          f"{missed} tick dilewati (total overrun {self.overruns}, dilewati {self.skipped}).")
+                    tick = upcoming
+                else:
+                    print(f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] ⚠️ Overrun: tick {tick.strftime('%H:%M:%S')} "
+                          f"dijalankan terlambat {late:.1f} detik (total overrun {self.overruns}).")
+
+        self._sleep_until(tick)
+        self.last_tick = tick
+        return tick
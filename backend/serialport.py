@@ -0,0 +1,99 @@
+import serial
+import threading
+import time
+from contextlib import contextmanager
+
+# Sesi port serial yang dipakai bersama oleh driver Modbus RTU (AT500, RT200, ...).
+# Satu handle terbuka per path device dan hanya dibuka ulang jika terjadi error.
+# Setiap port memiliki lock sendiri agar dua driver pada bus yang sama tidak
+# saling menyisipkan frame.
+
+# Waktu tunggu setelah port dibuka (hanya saat open/reopen, bukan per request)
+SETTLE_TIME = 0.2
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class PortSession:
+    def __init__(self, port):
+        self.port = port
+        self.lock = threading.RLock()
+        self.ser = None
+        self.settings = None
+
+    def _open(self, settings):
+        self.ser = serial.Serial(port=self.port, **settings)
+        self.settings = settings
+        time.sleep(SETTLE_TIME)
+        print(f"[SERIAL] Port {self.port} dibuka ({settings['baudrate']} baud).")
+
+    def acquire(self, settings):
+        """Pastikan port terbuka dengan setting yang diminta, lalu kembalikan objek serial."""
+        if self.ser is None or not self.ser.is_open:
+            self._open(settings)
+        elif settings != self.settings:
+            # Driver lain pada bus yang sama memakai setting berbeda
+            self.ser.apply_settings(settings)
+            self.settings = settings
+        return self.ser
+
+    def invalidate(self):
+        """Tutup handle agar dibuka ulang pada pemakaian berikutnya."""
+        try:
+            if self.ser is not None:
+                self.ser.close()
+        except Exception:
+            pass
+        self.ser = None
+        self.settings = None
+
+
+def get_session(port):
+    with _sessions_lock:
+        sess = _sessions.get(port)
+        if sess is None:
+            sess = PortSession(port)
+            _sessions[port] = sess
+        return sess
+
+
+@contextmanager
+def open_port(port, baudrate=19200, bytesize=serial.EIGHTBITS, parity=serial.PARITY_EVEN,
+              stopbits=serial.STOPBITS_ONE, timeout=1):
+    """
+    Pinjam port serial bersama secara eksklusif.
+
+    Contoh:
+        with open_port("/dev/ttyAMA5", 19200, parity=serial.PARITY_EVEN) as ser:
+            ser.write(request)
+            response = ser.read(9)
+
+    Jika terjadi error port (SerialException/OSError) di dalam blok, handle
+    ditutup dan akan dibuka ulang pada pemakaian berikutnya.
+    """
+    settings = {
+        'baudrate': baudrate,
+        'bytesize': bytesize,
+        'parity': parity,
+        'stopbits': stopbits,
+        'timeout': timeout,
+    }
+    sess = get_session(port)
+    with sess.lock:
+        try:
+            ser = sess.acquire(settings)
+            # Buang sisa byte dari transaksi sebelumnya
+            ser.reset_input_buffer()
+            yield ser
+        except (serial.SerialException, OSError):
+            sess.invalidate()
+            raise
+
+
+def close_all():
+    """Tutup semua port yang sedang terbuka."""
+    with _sessions_lock:
+        for sess in _sessions.values():
+            with sess.lock:
+                sess.invalidate()
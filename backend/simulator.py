@@ -0,0 +1,406 @@
+import argparse
+import json
+import os
+import random
+import select
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+import tty
+from modbus import crc16, DTYPES, BYTEORDERS, MAX_REGISTERS
+
+# Simulator perangkat Modbus tanpa hardware.
+#
+# - Setiap port serial di peta register (config/devices.json) menjadi satu pseudo-terminal
+#   (pty) yang menjawab request RTU sesuai slave, fungsi dan alamat register driver.
+# - SPECTRO disimulasikan dengan server Modbus TCP lokal.
+# - Latensi, jitter, frame hilang dan frame rusak dapat diatur untuk menguji driver.
+#
+# Contoh:
+#   python simulator.py --latency 0.02 --jitter 0.01 --drop 0.01 --corrupt 0.01
+# lalu salin baris *_PORT / SPECTRO_* yang dicetak ke config/env.
+
+DEVICE_MAP_PATH = os.getenv('DEVICE_MAP', os.path.join(os.path.dirname(os.path.abspath(__file__)), "../config/devices.json"))
+
+# Register SPECTRO (float32 input register, unit id 0xFF), sama dengan spectro.py
+SPECTRO_UNIT_ID = 0xFF
+SPECTRO_REGISTERS = (
+    ('turb', 0x0082),
+    ('tss', 0x008A),
+    ('cod', 0x0092),
+    ('bod', 0x009A),
+    ('no3', 0x00A2),
+    ('temp', 0x00AA),
+)
+
+
+class FaultModel:
+    """Latensi, jitter, dan peluang frame hilang / rusak untuk setiap respons."""
+
+    def __init__(self, latency=0.01, jitter=0.0, drop=0.0, corrupt=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.drop = drop
+        self.corrupt = corrupt
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def dropped(self):
+        with self.lock:
+            return self.random.random() < self.drop
+
+    def damage(self, frame):
+        """Balik satu bit acak pada frame dengan peluang `corrupt`. Return (frame, rusak)."""
+        with self.lock:
+            if self.random.random() >= self.corrupt:
+                return frame, False
+            frame = bytearray(frame)
+            frame[self.random.randrange(len(frame))] ^= 1 << self.random.randrange(8)
+            return bytes(frame), True
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.responses = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.bad_requests = 0
+        self.bytes_rx = 0
+        self.bytes_tx = 0
+
+    def add(self, **kwargs):
+        with self.lock:
+            for key, value in kwargs.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "responses": self.responses,
+                "dropped": self.dropped,
+                "corrupted": self.corrupted,
+                "bad_requests": self.bad_requests,
+                "bytes_rx": self.bytes_rx,
+                "bytes_tx": self.bytes_tx,
+            }
+
+
+class RegisterBank:
+    """
+    Memori register (slave, fungsi) -> 65536 register. Nilai field diperbarui setiap
+    kali dibaca dengan random walk kecil agar data terlihat hidup.
+    """
+
+    def __init__(self, seed=None):
+        self.banks = {}
+        self.fields = {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def add_field(self, slave, function, address, dtype='float32', byteorder='ABCD', scale=1, offset=0):
+        key = (slave, function)
+        self.banks.setdefault(key, bytearray(2 * 65536))
+        code, regs = DTYPES[dtype]
+        if code == 'f':
+            raw = self.random.uniform(1, 100)
+        else:
+            raw = self.random.randint(100, 1000)
+        self.fields.setdefault(key, []).append({
+            'address': address,
+            'code': code,
+            'regs': regs,
+            'order': BYTEORDERS[byteorder][0 if regs == 2 else 1],
+            'raw': raw,
+        })
+
+    def _encode(self, field):
+        abcd = struct.pack('>' + field['code'], field['raw'])
+        wire = bytearray(len(abcd))
+        for i, src in enumerate(field['order']):
+            wire[src] = abcd[i]
+        return wire
+
+    def read(self, slave, function, address, count):
+        """Return payload register, atau None jika slave/fungsi tidak ada."""
+        key = (slave, function)
+        bank = self.banks.get(key)
+        if bank is None:
+            return None
+        with self.lock:
+            for field in self.fields[key]:
+                if field['code'] == 'f':
+                    field['raw'] += self.random.uniform(-0.5, 0.5)
+                else:
+                    field['raw'] = max(0, min(0x7FFF, field['raw'] + self.random.randint(-2, 2)))
+                start = 2 * field['address']
+                bank[start:start + 2 * field['regs']] = self._encode(field)
+            return bytes(bank[2 * address:2 * (address + count)])
+
+
+class SerialSlave:
+    """Satu pty yang menjawab request Modbus RTU untuk semua perangkat pada port tersebut."""
+
+    def __init__(self, name, baudrate, bank, faults):
+        self.name = name
+        self.baudrate = baudrate
+        self.bank = bank
+        self.faults = faults
+        self.counters = Counters()
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, name=f"sim-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _wire_time(self, size):
+        return size * 11 / self.baudrate
+
+    def _serve(self):
+        buf = bytearray()
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.2)
+            if not ready:
+                # Sisa byte tanpa lanjutan dianggap frame rusak dan dibuang
+                if buf:
+                    self.counters.add(bad_requests=1)
+                    buf.clear()
+                continue
+            try:
+                chunk = os.read(self.master, 512)
+            except OSError:
+                return
+            self.counters.add(bytes_rx=len(chunk))
+            buf += chunk
+
+            # Request baca 0x03/0x04 selalu 8 byte; geser 1 byte jika CRC salah (sinkronisasi ulang)
+            while len(buf) >= 8:
+                frame = bytes(buf[:8])
+                if crc16(frame[:6]) != frame[6:]:
+                    del buf[0]
+                    self.counters.add(bad_requests=1)
+                    continue
+                del buf[:8]
+                self.counters.add(requests=1)
+                self._respond(frame)
+
+    def _respond(self, frame):
+        slave, function, address, count = struct.unpack('>BBHH', frame[:6])
+        if function in (0x03, 0x04) and 1 <= count <= MAX_REGISTERS:
+            payload = self.bank.read(slave, function, address, count)
+            if payload is None:
+                return  # Slave tidak ada di bus ini, perangkat nyata juga diam
+            pdu = struct.pack('>BBB', slave, function, 2 * count) + payload
+        else:
+            pdu = struct.pack('>BBB', slave, function | 0x80, 0x01)  # Illegal function
+        response = pdu + crc16(pdu)
+
+        time.sleep(self.faults.delay() + self._wire_time(len(frame) + len(response)))
+        if self.faults.dropped():
+            self.counters.add(dropped=1)
+            return
+        response, damaged = self.faults.damage(response)
+        if damaged:
+            self.counters.add(corrupted=1)
+        os.write(self.master, response)
+        self.counters.add(responses=1, bytes_tx=len(response))
+
+
+class _TcpHandler(socketserver.BaseRequestHandler):
+
+    def _recv_exact(self, size):
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.request.recv(size - len(buf))
+            if not chunk:
+                return None
+            buf += chunk
+        return bytes(buf)
+
+    def handle(self):
+        server = self.server
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            header = self._recv_exact(7)
+            if header is None:
+                return
+            tid, protocol_id, length, unit_id = struct.unpack('>HHHB', header)
+            pdu = self._recv_exact(length - 1)
+            if pdu is None:
+                return
+            server.counters.add(requests=1, bytes_rx=7 + len(pdu))
+
+            function = pdu[0]
+            payload = None
+            if function in (0x03, 0x04) and len(pdu) >= 5:
+                address, count = struct.unpack('>HH', pdu[1:5])
+                if 1 <= count <= MAX_REGISTERS:
+                    payload = server.bank.read(unit_id, function, address, count)
+            if payload is None:
+                reply = struct.pack('>BB', function | 0x80, 0x02)  # Illegal data address
+            else:
+                reply = struct.pack('>BB', function, len(payload)) + payload
+            response = struct.pack('>HHHB', tid, 0, len(reply) + 1, unit_id) + reply
+
+            time.sleep(server.faults.delay())
+            if server.faults.dropped():
+                server.counters.add(dropped=1)
+                continue
+            response, damaged = server.faults.damage(response)
+            if damaged:
+                server.counters.add(corrupted=1)
+            self.request.sendall(response)
+            server.counters.add(responses=1, bytes_tx=len(response))
+
+
+class TcpSlave(socketserver.ThreadingTCPServer):
+    """Server Modbus TCP lokal untuk SPECTRO."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host, port, bank, faults):
+        super().__init__((host, port), _TcpHandler)
+        self.bank = bank
+        self.faults = faults
+        self.counters = Counters()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="sim-spectro", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class Simulator:
+    """
+    Kumpulan slave serial (per variabel port di peta register) dan server TCP SPECTRO.
+
+    Atribut:
+        env (dict): variabel env yang perlu di-set agar service memakai simulator
+    """
+
+    def __init__(self, device_map=DEVICE_MAP_PATH, faults=None, tcp_host="127.0.0.1", tcp_port=0, seed=None):
+        self.faults = faults or FaultModel(seed=seed)
+        with open(device_map, 'r') as f:
+            spec = json.load(f)
+
+        self.buses = {}
+        self.env = {}
+        for name, dev in spec.items():
+            port_key = dev.get('port_env', f"{name.upper()}_PORT")
+            bus = self.buses.get(port_key)
+            if bus is None:
+                bus = SerialSlave(port_key, int(dev.get('baudrate', 19200)), RegisterBank(seed), self.faults)
+                self.buses[port_key] = bus
+                self.env[port_key] = bus.path
+            if 'status_env' in dev:
+                self.env[dev['status_env']] = "active"
+            for reg in dev['registers']:
+                bus.bank.add_field(
+                    int(reg.get('slave', dev.get('slave', 1))),
+                    int(reg.get('function', dev.get('function', 3))),
+                    int(str(reg['address']), 0),
+                    reg.get('dtype', dev.get('dtype', 'float32')),
+                    reg.get('byteorder', dev.get('byteorder', 'ABCD')).upper(),
+                    reg.get('scale', 1),
+                    reg.get('offset', 0),
+                )
+
+        # Kernel Linux menolak konfigurasi ulang pty dengan parity (EINVAL), dan parity tidak
+        # berarti apa pun pada pty, jadi service diarahkan ke salinan peta register dengan parity N
+        for dev in spec.values():
+            dev['parity'] = 'N'
+        fd, self.device_map = tempfile.mkstemp(prefix="sim_devices_", suffix=".json")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(spec, f, indent=4)
+        self.env["DEVICE_MAP"] = self.device_map
+
+        spectro_bank = RegisterBank(seed)
+        for _, address in SPECTRO_REGISTERS:
+            spectro_bank.add_field(SPECTRO_UNIT_ID, 0x04, address)
+        self.tcp = TcpSlave(tcp_host, tcp_port, spectro_bank, self.faults)
+        self.env["SPECTRO_STATUS"] = "active"
+        self.env["SPECTRO_IP"] = tcp_host
+        self.env["SPECTRO_PORT"] = str(self.tcp.server_address[1])
+
+    def start(self):
+        for bus in self.buses.values():
+            bus.start()
+        self.tcp.start()
+
+    def stop(self):
+        for bus in self.buses.values():
+            bus.stop()
+        self.tcp.stop()
+        try:
+            os.remove(self.device_map)
+        except OSError:
+            pass
+
+    def counters(self):
+        """Return dict bus -> statistik request/respons/byte."""
+        stats = {name: bus.counters.snapshot() for name, bus in self.buses.items()}
+        stats["SPECTRO"] = self.tcp.counters.snapshot()
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulator perangkat Modbus RTU (pty) dan Modbus TCP tanpa hardware.")
+    parser.add_argument("--devices", default=DEVICE_MAP_PATH, help="File peta register (devices.json)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Waktu respons perangkat (detik)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variasi acak waktu respons (+/- detik)")
+    parser.add_argument("--drop", type=float, default=0.0, help="Peluang respons tidak dikirim (0-1)")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="Peluang respons rusak / CRC salah (0-1)")
+    parser.add_argument("--tcp-port", type=int, default=1502, help="Port server Modbus TCP SPECTRO")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    faults = FaultModel(args.latency, args.jitter, args.drop, args.corrupt, args.seed)
+    sim = Simulator(args.devices, faults, tcp_port=args.tcp_port, seed=args.seed)
+    sim.start()
+
+    print("[SIM] ✅ Simulator berjalan. Gunakan nilai berikut di config/env:")
+    for key, value in sim.env.items():
+        print(f'{key}="{value}"')
+
+    try:
+        while True:
+            time.sleep(10)
+            for name, stats in sim.counters().items():
+                print(f"[SIM] {name}: {stats}")
+    except KeyboardInterrupt:
+        print("\n[SIM] 🛑 Simulator dihentikan.")
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# Snapshot data terbaru di shared memory, ditulis main.py dan dibaca /api/latest.
+#
+# File SNAPSHOT_FILE (default di /dev/shm, jadi tidak menulis ke kartu SD) berukuran
+# tetap SNAPSHOT_SIZE byte dan di-mmap oleh kedua proses:
+#
+#   magic "LSNP" | versi u16 | cadangan u16 | seq u64 | panjang u32 | crc32 u32 | payload JSON
+#
+# Penulis memakai seqlock: seq dibuat ganjil sebelum payload ditulis dan genap setelah
+# selesai. Pembaca menyalin payload lalu mengecek seq tidak berubah dan masih genap,
+# serta crc32 payload cocok; jika tidak, pembacaan diulang. Pembaca tidak pernah
+# mengunci penulis.
+
+SNAPSHOT_FILE = os.getenv('SNAPSHOT_FILE', "/dev/shm/logger_latest.snap")
+SNAPSHOT_SIZE = 4096
+# Snapshot lebih tua dari ini dianggap basi (default 2x DELAY); /api/latest lalu membaca database
+SNAPSHOT_MAX_AGE = float(os.getenv('SNAPSHOT_MAX_AGE', str(int(os.getenv('DELAY', '1')) * 120)))
+
+MAGIC = b"LSNP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQII")
+SEQ_OFFSET = 8
+READ_RETRIES = 5
+
+
+class SnapshotWriter:
+    def __init__(self, path=SNAPSHOT_FILE, size=SNAPSHOT_SIZE):
+        self.path = path
+        self.size = size
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, version, _, seq, _, _ = HEADER.unpack_from(self.map, 0)
+        # Lanjutkan seq dari proses sebelumnya agar pembaca tidak melihat seq mundur
+        self.seq = seq + (seq & 1) if magic == MAGIC and version == VERSION else 0
+
+    def publish(self, record):
+        """Tulis satu record (dict yang bisa di-JSON-kan). Return seq baru."""
+        payload = json.dumps(record, default=str).encode()
+        if HEADER.size + len(payload) > self.size:
+            raise ValueError(f"snapshot {len(payload)} byte melebihi {self.size - HEADER.size} byte")
+
+        self.seq += 1  # ganjil: sedang ditulis
+        struct.pack_into("<Q", self.map, SEQ_OFFSET, self.seq)
+        self.map[HEADER.size:HEADER.size + len(payload)] = payload
+        self.seq += 1  # genap: selesai
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, 0, self.seq, len(payload), zlib.crc32(payload))
+        return self.seq
+
+    def close(self):
+        self.map.close()
+
+
+class SnapshotReader:
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.map = None
+        self.inode = None
+
+    def _open(self):
+        """(Re)map file jika belum terbuka atau sudah dibuat ulang oleh penulis."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.map = None
+            return False
+        if self.map is None or st.st_ino != self.inode:
+            with open(self.path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.inode = st.st_ino
+        return True
+
+    def read(self):
+        """
+        Baca snapshot yang konsisten.
+
+        Return:
+            (int, dict) | None: (seq, record), atau None jika belum ada / gagal konsisten
+        """
+        if not self._open():
+            return None
+        for _ in range(READ_RETRIES):
+            magic, version, _, seq, length, crc = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION or seq == 0:
+                return None
+            if seq & 1:
+                time.sleep(0)  # penulis sedang menulis
+                continue
+            payload = self.map[HEADER.size:HEADER.size + length]
+            if struct.unpack_from("<Q", self.map, SEQ_OFFSET)[0] != seq or zlib.crc32(payload) != crc:
+                continue
+            return seq, json.loads(payload)
+        return None
+
+    def latest(self, max_age=SNAPSHOT_MAX_AGE):
+        """Record terbaru jika masih segar (field published dalam max_age detik), selain itu None."""
+        result = self.read()
+        if result is None:
+            return None
+        _, record = result
+        if time.time() - record.get("published", 0) > max_age:
+            return None
+        return record
@@ -13,75 +13,175 @@ if not load_dotenv(dotenv_path=env_path):
 STATUS = os.getenv('SPECTRO_STATUS')
 IP = os.getenv('SPECTRO_IP')
 PORT = os.getenv('SPECTRO_PORT')
+# active: baca 0x0082-0x00AB dalam satu request, inactive: 6 request terpisah (pipelined)
+BLOCK_READ = os.getenv('SPECTRO_BLOCK_READ', 'active')
+
+UNIT_ID = 0xFF          # Slave ID sensor
+TIMEOUT = 3             # Timeout socket (detik)
+MAX_BACKOFF = 60        # Jeda maksimum antar percobaan koneksi ulang (detik)
+
+# Alamat input register (float32, 2 register) per parameter
+SPECTRO_REGISTERS = (
+    ('turb', 0x0082),
+    ('tss', 0x008A),
+    ('cod', 0x0092),
+    ('bod', 0x009A),
+    ('no3', 0x00A2),
+    ('temp', 0x00AA),
+)
+BLOCK_START = 0x0082
+BLOCK_COUNT = 0x00AB - BLOCK_START + 1  # 42 register
+# Decode 6 float dari satu blok: tiap nilai 4 byte diikuti 12 byte register lain
+BLOCK_STRUCT = struct.Struct('>' + '12x'.join('f' * len(SPECTRO_REGISTERS)))
+
+
+class ModbusTcpError(Exception):
+    """Koneksi gagal, frame tidak valid, atau perangkat membalas dengan exception."""
+
+
+class ModbusTcpClient:
+    """
+    Klien Modbus TCP dengan koneksi persisten.
+
+    - Koneksi dipakai ulang antar siklus dan dibuka ulang dengan backoff bila putus.
+    - Respons dibaca berdasarkan header MBAP (length) sehingga frame selalu utuh.
+    - Setiap request memakai transaction id unik sehingga beberapa request dapat
+      dikirim sekaligus dan respons dicocokkan berdasarkan transaction id.
+    """
+
+    def __init__(self, host, port, unit_id=UNIT_ID, timeout=TIMEOUT):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self.sock = None
+        self.transaction_id = 0
+        self.backoff = 1
+        self.next_attempt = 0
+
+    def connect(self):
+        if self.sock is not None:
+            return
+        now = time.monotonic()
+        if now < self.next_attempt:
+            raise ModbusTcpError(f"menunggu koneksi ulang ({self.next_attempt - now:.0f} detik lagi)")
+        try:
+            print(f"Menghubungkan ke sensor Modbus TCP {self.host}:{self.port}...")
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock = sock
+            self.backoff = 1
+        except OSError as e:
+            self.next_attempt = now + self.backoff
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+            raise ModbusTcpError(f"gagal terhubung: {e}")
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def _next_transaction_id(self):
+        self.transaction_id = self.transaction_id % 0xFFFF + 1
+        return self.transaction_id
+
+    def _recv_exact(self, size):
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.sock.recv(size - len(buf))
+            if not chunk:
+                raise ModbusTcpError("koneksi ditutup oleh perangkat")
+            buf += chunk
+        return bytes(buf)
+
+    def read_input_registers_many(self, requests, function_code=0x04):
+        """
+        Kirim beberapa request baca register sekaligus dan tunggu semua respons.
+
+        Argumen:
+            requests (list): daftar (alamat_awal, jumlah_register)
+
+        Return:
+            list: payload data (bytes) untuk tiap request, urutan sama dengan input
+        """
+        self.connect()
+        try:
+            pending = {}
+            frames = bytearray()
+            for index, (address, count) in enumerate(requests):
+                tid = self._next_transaction_id()
+                pending[tid] = (index, count)
+                # MBAP: transaction id, protocol id (0), length (unit id + PDU), unit id
+                frames += struct.pack('>HHHB', tid, 0x0000, 6, self.unit_id)
+                frames += struct.pack('>BHH', function_code, address, count)
+            self.sock.sendall(frames)
+
+            results = [None] * len(requests)
+            while pending:
+                tid, protocol_id, length, _ = struct.unpack('>HHHB', self._recv_exact(7))
+                if protocol_id != 0 or length < 2:
+                    raise ModbusTcpError(f"header MBAP tidak valid (protocol={protocol_id}, length={length})")
+                pdu = self._recv_exact(length - 1)
+
+                if tid not in pending:
+                    # Respons terlambat dari request sebelumnya, abaikan
+                    continue
+                index, count = pending.pop(tid)
+                if pdu[0] & 0x80:
+                    raise ModbusTcpError(f"exception code 0x{pdu[1]:02X} untuk transaction {tid}")
+                if pdu[0] != function_code or pdu[1] != 2 * count or len(pdu) < 2 + 2 * count:
+                    raise ModbusTcpError(f"respons transaction {tid} tidak valid")
+                results[index] = pdu[2:2 + 2 * count]
+            return results
+
+        except (OSError, ModbusTcpError):
+            # Stream tidak lagi sinkron, buka koneksi baru di pembacaan berikutnya
+            self.close()
+            raise
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = ModbusTcpClient(IP, int(PORT))
+    return _client
+
+
+def probe():
+    """Satu request 2 register tanpa retry. Return True jika sensor merespons."""
+    try:
+        get_client().read_input_registers_many([(BLOCK_START, 2)])
+        return True
+    except Exception as e:
+        print(f"[SPECTRO] Probe gagal: {e}")
+        return False
 
-def send_modbus_request(sock, transaction_id, unit_id, start_address, register_count):
-    # Build request
-    protocol_id = 0x0000
-    length = 6
-    function_code = 0x04
-    header = struct.pack('>HHHB', transaction_id, protocol_id, length, unit_id)
-    body = struct.pack('>BHH', function_code, start_address, register_count)
-    request = header + body
-
-    # Kirim request
-    #print(f"Request (hex): {request.hex()}")
-    sock.send(request)
-    time.sleep(0.5)
-    response = sock.recv(1024)
-    #print(f"Response (hex): {response.hex()}")
-
-    # Validasi response
-    if not response or len(response) < 13:
-        print("Response tidak valid.")
-        return None
-
-    # Parse float (4 byte mulai byte ke-9)
-    value = round(struct.unpack('>f', response[9:13])[0], 2)
-    return value
 
 def read_modbus_tcp():
-    
+
     if STATUS.lower() != "active":
         print("[INFO] Modul SPECTRO tidak aktif. Melewati pembacaan data.")
         return None,None,None,None,None,None
-    
+
     try:
         print("[INFO] Modul SPECTRO aktif. Melakukan pembacaan data.")
-        print("Menghubungkan ke sensor Modbus TCP...")
-
-        ip = IP    # IP sensor
-        port = int(PORT)
-        unit_id = 0xFF          # Slave ID sensor
-
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3)
-        sock.connect((ip, port))
-
-        # Request Parameter 1
-        turb = send_modbus_request(sock, 1, unit_id, 0x0082, 2)
-        print(f"Turbidity: {turb}")
-
-        # Request Parameter 2
-        tss = send_modbus_request(sock, 2, unit_id, 0x008A, 2)
-        print(f"TSS: {tss}")
-
-        # Request Parameter 3
-        cod = send_modbus_request(sock, 2, unit_id, 0x0092, 2)
-        print(f"COD: {cod}")
-
-        # Request Parameter 4
-        bod = send_modbus_request(sock, 2, unit_id, 0x009A, 2)
-        print(f"BOD: {bod}")
-
-        # Request Parameter 5
-        no3 = send_modbus_request(sock, 2, unit_id, 0x00A2, 2)
-        print(f"NO3: {no3}")
+        client = get_client()
 
-        # Request Parameter 6
-        temp = send_modbus_request(sock, 2, unit_id, 0x00AA, 2)
-        print(f"Temperature: {temp}")
+        if BLOCK_READ.lower() == "active":
+            payload, = client.read_input_registers_many([(BLOCK_START, BLOCK_COUNT)])
+            values = BLOCK_STRUCT.unpack(payload)
+        else:
+            payloads = client.read_input_registers_many([(address, 2) for _, address in SPECTRO_REGISTERS])
+            values = [struct.unpack('>f', payload)[0] for payload in payloads]
 
-        sock.close()
+        turb, tss, cod, bod, no3, temp = (round(v, 2) for v in values)
+        print(f"Turbidity: {turb}, TSS: {tss}, COD: {cod}, BOD: {bod}, NO3: {no3}, Temperature: {temp}")
         return turb, tss, cod, bod, no3, temp
 
     except Exception as e:
@@ -0,0 +1,186 @@
+import glob
+import json
+import os
+import threading
+import time
+
+# Spool lokal (write-ahead) untuk data sensor.
+#
+# Setiap baris ditulis lebih dulu ke file segmen JSONL append-only di disk, lalu thread
+# flusher memindahkannya ke database. Jika database mati, segmen tetap tersimpan dan
+# dikirim ulang begitu database kembali, jadi loop sensor tidak pernah menunggu MySQL.
+#
+# - current.jsonl      : segmen aktif (ditambah baris baru)
+# - seg-<waktu>.jsonl  : segmen tertutup yang menunggu dikirim, dihapus setelah commit
+#
+# fsync dilakukan per batch (SPOOL_FSYNC_BATCH baris atau SPOOL_FSYNC_INTERVAL detik),
+# dan selalu sebelum segmen ditutup.
+
+SPOOL_DIR = os.getenv('SPOOL_DIR', "/opt/logger/data/spool")
+SPOOL_FSYNC_BATCH = int(os.getenv('SPOOL_FSYNC_BATCH', '10'))
+SPOOL_FSYNC_INTERVAL = float(os.getenv('SPOOL_FSYNC_INTERVAL', '5'))
+SPOOL_FLUSH_INTERVAL = float(os.getenv('SPOOL_FLUSH_INTERVAL', '5'))
+SPOOL_SEGMENT_BYTES = int(os.getenv('SPOOL_SEGMENT_BYTES', str(1024 * 1024)))
+SPOOL_BATCH_ROWS = int(os.getenv('SPOOL_BATCH_ROWS', '500'))
+MAX_BACKOFF = 60
+
+CURRENT = "current.jsonl"
+
+
+class Spool:
+    def __init__(self, directory, sink):
+        """
+        Argumen:
+            directory (str): folder segmen spool
+            sink (callable): sink(rows) menulis list baris ke database, raise jika gagal
+        """
+        self.directory = directory
+        self.sink = sink
+        self.lock = threading.Lock()
+        # flush() bisa dipanggil thread flusher dan stop() bersamaan; satu segmen tidak boleh terkirim dua kali
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.file = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.backoff = SPOOL_FLUSH_INTERVAL
+        os.makedirs(directory, exist_ok=True)
+
+    # === Penulisan (dipanggil dari loop sensor) ===
+
+    def _open(self):
+        if self.file is None:
+            self.file = open(os.path.join(self.directory, CURRENT), "a", encoding="utf-8")
+        return self.file
+
+    def _sync(self):
+        if self.file is not None and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def append(self, row):
+        """Tambahkan satu baris (list/tuple nilai kolom) ke spool. Tidak menyentuh database."""
+        line = json.dumps(row, default=str) + "\n"
+        with self.lock:
+            f = self._open()
+            f.write(line)
+            self.unsynced += 1
+            if self.unsynced >= SPOOL_FSYNC_BATCH or time.monotonic() - self.last_sync >= SPOOL_FSYNC_INTERVAL:
+                self._sync()
+            else:
+                f.flush()
+        # Saat database sedang backoff, biarkan flusher menunggu jadwalnya sendiri
+        if self.backoff <= SPOOL_FLUSH_INTERVAL:
+            self.wakeup.set()
+
+    def _seal(self):
+        """Tutup segmen aktif menjadi segmen siap kirim."""
+        with self.lock:
+            path = os.path.join(self.directory, CURRENT)
+            if self.file is not None:
+                self._sync()
+                self.file.close()
+                self.file = None
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                os.replace(path, os.path.join(self.directory, f"seg-{time.time_ns()}.jsonl"))
+
+    # === Pengiriman ke database (thread flusher) ===
+
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "seg-*.jsonl")))
+
+    def pending(self):
+        """Jumlah segmen tertutup yang belum terkirim (untuk log/monitoring)."""
+        return len(self.segments())
+
+    def _read_segment(self, path):
+        rows = []
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # Baris terakhir bisa terpotong jika listrik mati saat menulis
+                    print(f"[SPOOL] ⚠️ Baris {number} di {os.path.basename(path)} rusak, dilewati.")
+        return rows
+
+    def drain(self):
+        """
+        Kirim semua segmen tertutup ke database secara berurutan.
+
+        Return:
+            bool: True jika semua segmen terkirim, False jika database gagal
+        """
+        for path in self.segments():
+            rows = self._read_segment(path)
+            try:
+                for i in range(0, len(rows), SPOOL_BATCH_ROWS):
+                    self.sink(rows[i:i + SPOOL_BATCH_ROWS])
+            except Exception as e:
+                print(f"[SPOOL] ❌ Gagal mengirim {os.path.basename(path)} ke database: {e}")
+                return False
+            os.remove(path)
+        return True
+
+    def flush(self):
+        """Kirim segmen lama dulu; segmen aktif hanya ditutup jika database bisa dihubungi."""
+        with self.flush_lock:
+            if not self.drain():
+                return False
+            size = 0
+            path = os.path.join(self.directory, CURRENT)
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+            if size == 0:
+                return True
+            self._seal()
+            return self.drain()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.backoff)
+            self.wakeup.clear()
+            if self.flush():
+                self.backoff = SPOOL_FLUSH_INTERVAL
+            else:
+                # Database belum bisa dihubungi, data tetap aman di spool
+                self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+                print(f"[SPOOL] {self.pending()} segmen menunggu, coba lagi dalam {self.backoff:.0f} detik.")
+
+            # Segmen aktif dibatasi ukurannya agar satu batch tidak terlalu besar
+            with self.lock:
+                path = os.path.join(self.directory, CURRENT)
+                oversized = os.path.exists(path) and os.path.getsize(path) >= SPOOL_SEGMENT_BYTES
+            if oversized:
+                self._seal()
+
+    def start(self):
+        """Mulai thread flusher. Sisa current.jsonl dari proses sebelumnya ikut dikirim."""
+        if self.thread is not None:
+            return
+        self._seal()
+        pending = self.pending()
+        if pending:
+            print(f"[SPOOL] ℹ️ {pending} segmen dari sesi sebelumnya akan dikirim ke database.")
+        self.thread = threading.Thread(target=self._run, name="spool-flusher", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10):
+        """Hentikan flusher: fsync data terakhir dan coba kirim sekali lagi."""
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                print(f"[SPOOL] ⚠️ Flusher belum selesai setelah {timeout} detik, menunggu pengiriman berjalan.")
+            self.thread = None
+        with self.lock:
+            self._sync()
+        self.flush()
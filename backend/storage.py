@@ -0,0 +1,233 @@
+import os
+import numpy as np
+import pandas as pd
+from db import connection
+import archive
+import rollups
+from tsstore import TSStore
+
+# Antarmuka baca/tulis data sensor yang tidak bergantung pada backend penyimpanan.
+#
+# STORAGE_BACKEND=mysql   : tabel data MySQL (+ arsip bulanan untuk data lama)
+# STORAGE_BACKEND=tsstore : penyimpanan time-series tertanam (tsstore.py), tanpa server MySQL
+# STORAGE_BACKEND=postgres: PostgreSQL/TimescaleDB (pgstore.py), untuk server pusat
+#
+# Dipakai oleh config.py (sink spool) dan app.py (latest, history, windrose, export).
+# aggregate()/wind_aggregate() mengembalikan None jika backend tidak punya agregasi,
+# dan app.py lalu memakai data mentah. aggregate() untuk beberapa param sekaligus
+# menghasilkan satu baris per bucket dengan kolom "<param>:avg", "<param>:min", "<param>:max".
+# Nama param/kolom harus sudah divalidasi pemanggil (app.resolve_params).
+# Status pengiriman KLHK/HAS (klhk/, hasSend.py) diubah per baris dan tetap memakai MySQL.
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mysql').lower()
+
+
+def to_dataframe(rows):
+    df = pd.DataFrame(rows)
+    df.fillna(value=pd.NA, inplace=True)
+    return df.astype(object).where(pd.notnull(df), None)
+
+
+class MySQLStorage:
+    name = "mysql"
+    _columns = None
+
+    def aggregate(self, params, start, resolution):
+        """Rata-rata/min/max per bucket dari tabel rollup, semua param dalam satu query."""
+        names = {p.lower(): p for p in params}
+        df = self.query(rollups.history_query(resolution, len(names)), (*names, start))
+        if df.empty:
+            return pd.DataFrame(columns=["date"])
+        # Format panjang (bucket, param) -> satu baris per bucket
+        wide = df.pivot(index="date", columns="param", values=["avg", "min", "max"])
+        wide.columns = [f"{names[param]}:{stat}" for stat, param in wide.columns]
+        return to_dataframe(wide.reset_index())
+
+    def wind_aggregate(self, start, resolution):
+        return self.query(rollups.wind_query(resolution), (start,))
+
+    def query(self, query, params=None):
+        with connection() as conn:
+            with conn.cursor(dictionary=True) as cursor:
+                cursor.execute(query, params or ())
+                rows = cursor.fetchall()
+        return to_dataframe(rows)
+
+    def latest(self, columns):
+        df = self.query(f"SELECT {', '.join(columns + ['date'])} FROM data ORDER BY date DESC LIMIT 1")
+        return None if df.empty else df.iloc[0].to_dict()
+
+    def read_range(self, start, end=None, columns=None):
+        """Baris dengan start <= date (<= end); bagian sebelum jendela MySQL dibaca dari arsip."""
+        fields = "*" if columns is None else ", ".join(["date"] + [f"`{c}`" for c in columns])
+        hot_start = archive.hot_start()
+        query = f"SELECT {fields} FROM data WHERE date >= %s"
+        params = [max(start, hot_start)]
+        if end is not None:
+            query += " AND date <= %s"
+            params.append(end)
+        df = self.query(query + " ORDER BY date ASC", params)
+
+        if start < hot_start:
+            cold = archive.read_range(start, hot_start if end is None else min(end, hot_start), columns)
+            # Arsip menyimpan nama kolom huruf kecil; samakan dengan nama di tabel (misalnya pH)
+            names = columns if columns is not None else self.table_columns()
+            cold = cold.rename(columns={c.lower(): c for c in names})
+            df = pd.concat([cold, df], ignore_index=True)
+            if columns is None:
+                df = df[[c for c in names if c in df.columns] + [c for c in df.columns if c not in names]]
+            df = to_dataframe(df)
+        return df
+
+    def table_columns(self):
+        """Nama kolom tabel data sesuai definisinya (urut)."""
+        if self._columns is None:
+            with connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT * FROM data LIMIT 0")
+                    cursor.fetchall()
+                    self._columns = [d[0] for d in cursor.description]
+        return self._columns
+
+
+class TSStoreStorage:
+    name = "tsstore"
+
+    def __init__(self, writable=False):
+        self.store = TSStore(writable=writable)
+
+    def ensure_schema(self):
+        return True
+
+    def aggregate(self, params, start, resolution):
+        return None
+
+    def wind_aggregate(self, start, resolution):
+        return None
+
+    def write_rows(self, records):
+        self.store.write_rows(records)
+
+    def _frame(self, ts, values, columns):
+        frame = {"date": pd.to_datetime(ts.astype("datetime64[s]"))}
+        for column in columns:
+            data = values.get(column.lower())
+            if data is None:
+                continue
+            # Lewat repr terpendek float32 agar 7.1 tidak menjadi 7.099999904632568
+            frame[column] = data.astype(str).astype(np.float64)
+        return to_dataframe(frame)
+
+    def latest(self, columns):
+        result = self.store.latest([c.lower() for c in columns])
+        if result is None:
+            return None
+        ts, values = result
+        df = self._frame(np.array([ts]), {c: np.array([v]) for c, v in values.items()}, columns)
+        return df.iloc[0].to_dict()
+
+    def read_range(self, start, end=None, columns=None):
+        columns = columns or list(self.store.columns)
+        epoch = lambda value: int(np.datetime64(value, "s").astype(np.int64))
+        ts, values = self.store.range(
+            epoch(start), None if end is None else epoch(end), [c.lower() for c in columns]
+        )
+        return self._frame(ts, values, columns)
+
+
+class PostgresStorage:
+    name = "postgres"
+
+    def __init__(self):
+        import pgstore
+        self.pg = pgstore
+
+    def ensure_schema(self):
+        with self.pg.connection() as conn:
+            with conn.cursor() as cursor:
+                self.pg.ensure_schema(cursor)
+            conn.commit()
+        return True
+
+    def write_rows(self, records):
+        columns = [c for c in self.pg.COLUMNS if c in records[0]]
+        with self.pg.connection() as conn:
+            with conn.cursor() as cursor:
+                inserted = self.pg.copy_rows(cursor, columns, [[r[c] for c in columns] for r in records])
+            conn.commit()
+        skipped = len(records) - inserted
+        print(f"[SPOOL] ✅ {inserted} baris masuk PostgreSQL" + (f", {skipped} duplikat dilewati." if skipped else "."))
+
+    def query(self, query, params=None):
+        with self.pg.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params or ())
+                names = [d[0] for d in cursor.description]
+                rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+            conn.rollback()
+        return to_dataframe(rows)
+
+    def _fields(self, columns):
+        # Alias dengan nama yang diminta (misalnya pH), kolom PostgreSQL selalu huruf kecil
+        return ", ".join(['"date"'] + [f'{self.pg.quote(c)} AS "{c}"' for c in columns])
+
+    def latest(self, columns):
+        df = self.query(f'SELECT {self._fields(columns)} FROM data ORDER BY "date" DESC LIMIT 1')
+        return None if df.empty else df.iloc[0].to_dict()
+
+    def read_range(self, start, end=None, columns=None):
+        fields = "*" if columns is None else self._fields(columns)
+        query = f'SELECT {fields} FROM data WHERE "date" >= %s'
+        params = [start]
+        if end is not None:
+            query += ' AND "date" <= %s'
+            params.append(end)
+        df = self.query(query + ' ORDER BY "date" ASC', params)
+        if columns is None and "id" in df.columns:
+            df = df.drop(columns=["id"])
+        return df
+
+    def aggregate(self, params, start, resolution):
+        with self.pg.connection() as conn:
+            with conn.cursor() as cursor:
+                bucket = self.pg.bucket_expression(cursor, resolution)
+            conn.rollback()
+        fields = ", ".join(
+            f'{fn}({self.pg.quote(p)}) AS "{p}:{stat}"'
+            for p in params for fn, stat in (("AVG", "avg"), ("MIN", "min"), ("MAX", "max"))
+        )
+        return self.query(f"""
+            SELECT {bucket} AS "date", {fields}
+            FROM data WHERE "date" >= %s
+            GROUP BY 1 ORDER BY 1
+        """, (start,))
+
+    def wind_aggregate(self, start, resolution):
+        with self.pg.connection() as conn:
+            with conn.cursor() as cursor:
+                bucket = self.pg.bucket_expression(cursor, resolution)
+            conn.rollback()
+        # Arah angin: rata-rata vektor satuan
+        return self.query(f"""
+            SELECT {bucket} AS "date", AVG(wspeed) AS wspeed,
+                   MOD(CAST(DEGREES(ATAN2(AVG(SIN(RADIANS(wdir))), AVG(COS(RADIANS(wdir))))) + 360 AS NUMERIC), 360) AS wdir
+            FROM data WHERE "date" >= %s
+            GROUP BY 1 ORDER BY 1
+        """, (start,))
+
+
+_storages = {}
+
+
+def get_storage(writable=False):
+    """Backend sesuai STORAGE_BACKEND (satu instance per proses untuk setiap mode writable)."""
+    storage = _storages.get(writable)
+    if storage is None:
+        if STORAGE_BACKEND == "tsstore":
+            storage = TSStoreStorage(writable=writable)
+        elif STORAGE_BACKEND == "postgres":
+            storage = PostgresStorage()
+        else:
+            storage = MySQLStorage()
+        _storages[writable] = storage
+    return storage
@@ -0,0 +1,107 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+# Fan-out data baru ke klien Server-Sent Events (/api/stream).
+#
+# Satu thread pengamat per proses web membaca seq snapshot shared memory (snapshot.py)
+# yang ditulis main.py setiap record tersimpan. Jika seq berubah, record dikirim ke
+# antrean setiap klien yang terhubung, jadi berapa pun tab dashboard yang terbuka,
+# biayanya satu pembacaan snapshot per sampel dan tidak ada query database.
+#
+# Event terakhir disimpan di ring buffer (STREAM_BUFFER) agar klien yang tersambung
+# ulang dengan Last-Event-ID menerima event yang terlewat. Jika id tersebut sudah keluar
+# dari buffer (atau seq snapshot direset), klien menerima event "reset" dan memuat
+# ulang datanya sendiri.
+#
+# Klien yang antreannya penuh (terlalu lambat) ditandai overflow dan dilepas; /api/stream
+# lalu menutup koneksinya sehingga EventSource tersambung ulang dengan Last-Event-ID.
+
+STREAM_POLL = float(os.getenv('STREAM_POLL', '0.5'))            # Jeda cek seq snapshot (detik)
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', '15'))   # Komentar ping agar proxy tidak memutus koneksi
+STREAM_BUFFER = int(os.getenv('STREAM_BUFFER', '100'))          # Event yang disimpan untuk Last-Event-ID
+
+
+class Broadcaster:
+    def __init__(self, reader, poll=STREAM_POLL, buffer=STREAM_BUFFER):
+        """
+        Argumen:
+            reader: SnapshotReader, read() -> (seq, record) | None
+        """
+        self.reader = reader
+        self.poll = poll
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.history = deque(maxlen=buffer)
+        self.thread = None
+        self.last_seq = None
+
+    def _watch(self):
+        # Snapshot yang sudah ada saat watcher mulai bukan data baru: hanya catat seq-nya
+        try:
+            result = self.reader.read()
+            self.last_seq = result[0] if result is not None else None
+        except Exception as e:
+            print(f"[STREAM] ⚠️ Gagal membaca snapshot: {e}")
+        while True:
+            try:
+                result = self.reader.read()
+                if result is not None and result[0] != self.last_seq:
+                    self.last_seq = result[0]
+                    self.publish(*result)
+            except Exception as e:
+                print(f"[STREAM] ⚠️ Gagal membaca snapshot: {e}")
+            time.sleep(self.poll)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._watch, name="stream-watcher", daemon=True)
+                self.thread.start()
+
+    def publish(self, seq, record):
+        event = (seq, record)
+        with self.lock:
+            self.history.append(event)
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Klien terlalu lambat: tandai agar stream-nya ditutup dan tersambung ulang
+                # dengan Last-Event-ID (backlog dari buffer, atau reset)
+                q.overflow = True
+                self.unsubscribe(q)
+
+    def subscribe(self, last_id=None):
+        """
+        Daftarkan klien baru.
+
+        Return:
+            (queue.Queue, list, bool): antrean event, event terlewat sejak last_id,
+            dan True jika klien harus memuat ulang datanya (event reset)
+        """
+        self.start()
+        q = queue.Queue(maxsize=self.history.maxlen)
+        q.overflow = False
+        with self.lock:
+            backlog = []
+            reset = False
+            if last_id is not None:
+                # Buffer hanya bisa melanjutkan jika last_id masih di dalam rentangnya
+                if self.history and self.history[0][0] <= last_id <= self.history[-1][0]:
+                    backlog = [event for event in self.history if event[0] > last_id]
+                else:
+                    reset = True
+            self.subscribers.add(q)
+        return q, backlog, reset
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def clients(self):
+        with self.lock:
+            return len(self.subscribers)
@@ -0,0 +1,247 @@
+import functools
+import json
+import os
+import numpy as np
+from rollups import PARAMS
+
+# Penyimpanan time-series tertanam (append-only), alternatif MySQL untuk stasiun kecil.
+#
+# Struktur direktori TSSTORE_DIR:
+#   head/ts.i64, head/<kolom>.f32   : segmen aktif, kolom lebar tetap yang di-mmap
+#   head/count.u64                  : jumlah baris valid di segmen aktif
+#   seg-<ts_pertama>.npz            : segmen tertutup, terkompresi
+#   index.json                      : index jarang: per segmen tertutup ts pertama/terakhir dan jumlah baris
+#
+# Baris ditulis ke kolom head dulu, baru count dinaikkan, jadi baris yang terpotong
+# karena listrik mati tidak pernah terbaca. Saat head penuh (TSSTORE_SEGMENT_ROWS) isinya
+# ditutup menjadi segmen: timestamp disimpan sebagai delta (selisih antar baris) dan
+# float32 di-XOR dengan nilai sebelumnya (nilai sensor yang mirip menghasilkan banyak
+# bit nol), lalu dikompresi deflate oleh np.savez_compressed.
+#
+# Timestamp adalah detik epoch dari waktu lokal (kolom date), data harus berurutan waktu:
+# baris dengan waktu <= baris terakhir dianggap duplikat (kiriman ulang spool) dan dilewati.
+
+TSSTORE_DIR = os.getenv('TSSTORE_DIR', "/opt/logger/data/tsstore")
+TSSTORE_SEGMENT_ROWS = int(os.getenv('TSSTORE_SEGMENT_ROWS', '10080'))  # 1 minggu @ 1 menit
+
+COLUMNS = PARAMS + ('samples',)
+INDEX_FILE = "index.json"
+
+
+def encode_segment(ts, columns):
+    """Kompresi delta (timestamp) dan XOR (float32) untuk satu segmen."""
+    arrays = {"ts_first": ts[:1], "ts_delta": np.diff(ts)}
+    for name, values in columns.items():
+        bits = values.view(np.uint32)
+        arrays[name] = bits ^ np.concatenate(([0], bits[:-1])).astype(np.uint32)
+    return arrays
+
+
+@functools.lru_cache(maxsize=8)
+def decode_segment(path):
+    """Kebalikan encode_segment. Hasil di-cache karena segmen tertutup tidak berubah."""
+    with np.load(path) as npz:
+        ts = np.concatenate((npz["ts_first"], npz["ts_first"] + np.cumsum(npz["ts_delta"])))
+        columns = {}
+        for name in npz.files:
+            if name in ("ts_first", "ts_delta"):
+                continue
+            columns[name] = np.bitwise_xor.accumulate(npz[name]).view(np.float32)
+    ts.flags.writeable = False
+    for values in columns.values():
+        values.flags.writeable = False
+    return ts, columns
+
+
+class TSStore:
+    def __init__(self, directory=TSSTORE_DIR, columns=COLUMNS, segment_rows=TSSTORE_SEGMENT_ROWS, writable=False):
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.segment_rows = segment_rows
+        self.writable = writable
+        self.head = None
+
+    # === Segmen aktif (head) ===
+
+    def _head_path(self, name):
+        return os.path.join(self.directory, "head", name)
+
+    def _map(self, name, dtype, length):
+        path = self._head_path(name)
+        if self.writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.truncate(np.dtype(dtype).itemsize * length)
+        return np.memmap(path, dtype=dtype, mode="r+" if self.writable else "r", shape=(length,))
+
+    def _open_head(self):
+        """Mmap kolom head. Return False jika head belum pernah dibuat (mode baca)."""
+        if self.head is not None:
+            return True
+        if self.writable:
+            os.makedirs(os.path.join(self.directory, "head"), exist_ok=True)
+        elif not os.path.exists(self._head_path("count.u64")):
+            return False
+        head = {"ts": self._map("ts.i64", np.int64, self.segment_rows)}
+        for name in self.columns:
+            head[name] = self._map(f"{name}.f32", np.float32, self.segment_rows)
+        # count ditulis terakhir, sebagai penanda baris yang sudah lengkap
+        head["count"] = self._map("count.u64", np.uint64, 1)
+        self.head = head
+
+        # Crash setelah segmen tercatat di index tapi sebelum head dikosongkan
+        segments = self.load_index()["segments"]
+        if self.writable and self._count() and segments and int(head["ts"][self._count() - 1]) <= segments[-1]["last"]:
+            head["count"][0] = 0
+            head["count"].flush()
+        return True
+
+    def _count(self):
+        return int(self.head["count"][0])
+
+    # === Index segmen tertutup ===
+
+    def load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"segments": []}
+
+    def _save_index(self, index):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _seal(self):
+        """Tutup head menjadi segmen terkompresi lalu kosongkan head."""
+        count = self._count()
+        if count == 0:
+            return
+        ts = np.array(self.head["ts"][:count])
+        columns = {name: np.array(self.head[name][:count]) for name in self.columns}
+        filename = f"seg-{ts[0]}.npz"
+        np.savez_compressed(os.path.join(self.directory, filename), **encode_segment(ts, columns))
+
+        index = self.load_index()
+        index["segments"].append({"file": filename, "first": int(ts[0]), "last": int(ts[-1]), "rows": count})
+        self._save_index(index)
+        self.head["count"][0] = 0
+        self.head["count"].flush()
+        print(f"[TSSTORE] 📦 Segmen {filename} ditutup ({count} baris).")
+
+    def last_ts(self, index=None):
+        if self._open_head() and self._count():
+            return int(self.head["ts"][self._count() - 1])
+        segments = (index or self.load_index())["segments"]
+        return segments[-1]["last"] if segments else None
+
+    # === Tulis ===
+
+    def append(self, ts, values):
+        """
+        Tambahkan satu baris. ts: detik epoch, values: dict kolom -> float/None.
+
+        Return:
+            bool: False jika baris dilewati karena waktunya tidak lebih baru
+        """
+        last = self.last_ts()
+        if last is not None and ts <= last:
+            return False
+        if self._count() >= self.segment_rows:
+            self._seal()
+        row = self._count()
+        self.head["ts"][row] = ts
+        for name in self.columns:
+            value = values.get(name)
+            self.head[name][row] = np.nan if value is None else value
+        self.head["count"][0] = row + 1
+        return True
+
+    def flush(self):
+        for array in self.head.values():
+            array.flush()
+
+    def write_rows(self, records):
+        """Tulis banyak baris (dict kolom tabel data, minimal berisi date) lalu flush mmap."""
+        self._open_head()
+        written = 0
+        for record in records:
+            ts = int(np.datetime64(str(record["date"])[:19].replace(" ", "T"), "s").astype(np.int64))
+            written += self.append(ts, record)
+        self.flush()
+        skipped = len(records) - written
+        print(f"[SPOOL] ✅ {written} baris masuk tsstore" + (f", {skipped} duplikat dilewati." if skipped else "."))
+
+    # === Baca ===
+
+    def range(self, start=None, end=None, columns=None):
+        """
+        Ambil baris dengan start <= ts <= end (detik epoch, None = tanpa batas).
+
+        Return:
+            (ts, {kolom: array}): array float32
+        """
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        lo = -2 ** 62 if start is None else start
+        hi = 2 ** 62 if end is None else end
+
+        parts = []
+        head_ts, index = self._read_head(columns)
+        if head_ts is not None:
+            head_ts, head_cols = head_ts
+        sealed = index["segments"][-1]["last"] if index["segments"] else None
+
+        for segment in index["segments"]:
+            if segment["last"] < lo or segment["first"] > hi:
+                continue
+            ts, values = decode_segment(os.path.join(self.directory, segment["file"]))
+            a, b = np.searchsorted(ts, lo, "left"), np.searchsorted(ts, hi, "right")
+            parts.append((ts[a:b], {c: values[c][a:b] for c in columns}))
+
+        if head_ts is not None:
+            floor = lo if sealed is None else max(lo, sealed + 1)
+            a, b = np.searchsorted(head_ts, floor, "left"), np.searchsorted(head_ts, hi, "right")
+            parts.append((head_ts[a:b], {c: head_cols[c][a:b] for c in columns}))
+
+        parts = [p for p in parts if len(p[0])]
+        if not parts:
+            return np.empty(0, np.int64), {c: np.empty(0, np.float32) for c in columns}
+        if len(parts) == 1:
+            return parts[0]
+        return (np.concatenate([p[0] for p in parts]),
+                {c: np.concatenate([p[1][c] for p in parts]) for c in columns})
+
+    def _read_head(self, columns, retries=5):
+        """
+        Salin baris head beserta index yang konsisten dengannya.
+
+        Penulis di proses lain bisa menutup head (_seal) lalu menimpa baris dari awal saat
+        head sedang disalin. Salinan dianggap valid jika index tidak bertambah segmen dan
+        count tidak mengecil selama penyalinan; jika tidak, baca ulang.
+
+        Return:
+            ((ts, {kolom: array}) | None, index)
+        """
+        for _ in range(retries):
+            before = self.load_index()
+            if not self._open_head():
+                return None, before
+            count = self._count()
+            ts = np.array(self.head["ts"][:count])
+            cols = {c: np.array(self.head[c][:count]) for c in columns}
+            after = self.load_index()
+            if len(after["segments"]) == len(before["segments"]) and self._count() >= count:
+                return (ts, cols), after
+        # Head terus berubah: pakai segmen saja, baris head yang belum ditutup dilewati
+        return None, self.load_index()
+
+    def latest(self, columns=None):
+        """Baris terakhir sebagai (ts, {kolom: float}) atau None."""
+        last = self.last_ts()
+        if last is None:
+            return None
+        ts, values = self.range(last, last, columns)
+        if not len(ts):
+            return None
+        return int(ts[-1]), {c: v[-1] for c, v in values.items()}
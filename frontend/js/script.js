@@ -11,8 +11,12 @@ async function initializeDashboard() {
 
         await updateAllData(); // Lakukan fetch data pertama kali
 
-        // Set interval untuk refresh data
-        setInterval(updateAllData, 30000); // Refresh setiap 30 detik
+        // Data baru didorong server lewat SSE; polling hanya jika browser tidak mendukung
+        if (window.EventSource) {
+            subscribeStream();
+        } else {
+            setInterval(updateAllData, 30000); // Refresh setiap 30 detik
+        }
 
     } catch (e) {
         console.error("Gagal inisialisasi dashboard:", e);
@@ -95,6 +99,28 @@ function initializeMap() {
     marker = L.marker([latitude, longitude]).addTo(map).bindPopup("Lokasi Sensor").openPopup();
 }
 
+// Berlangganan /api/stream: satu event per record baru dari service sensor.
+// EventSource tersambung ulang sendiri dan mengirim Last-Event-ID, jadi event yang
+// terlewat dikirim ulang server; event "reset" berarti data harus dimuat ulang penuh.
+function subscribeStream() {
+    const source = new EventSource('/api/stream');
+
+    source.addEventListener('reading', (e) => {
+        const range = document.getElementById('time-range').value;
+        renderLatest(JSON.parse(e.data));
+        renderHistoryChart(); // membaca rentang dari #time-range, hanya delta sejak cursor
+        renderWindRose(range);
+    });
+
+    source.addEventListener('reset', () => {
+        updateAllData();
+    });
+
+    source.onerror = () => {
+        console.warn("Koneksi /api/stream terputus, menyambung ulang...");
+    };
+}
+
 // Fungsi untuk mengambil data terbaru dan memperbarui kartu
 async function updateLatestData() {
     try {
@@ -106,27 +132,32 @@ async function updateLatestData() {
             return;
         }
 
-        // Update semua kartu
-        Object.keys(data).forEach(key => {
-            const valueEl = document.getElementById(`${key}-value`);
-            if (valueEl && typeof data[key] === 'number') {
-                valueEl.textContent = data[key].toFixed(2);
-            }
+        renderLatest(data);
 
-            if (data[key] === null) {
-                valueEl.textContent = 'N/A';
-            }
+    } catch (e) {
+        console.error("Gagal fetch data terbaru:", e);
+    }
+}
 
-        });
+// Perbarui kartu nilai dari satu record (respons /api/latest atau event stream)
+function renderLatest(data) {
+    // Update semua kartu
+    Object.keys(data).forEach(key => {
+        const valueEl = document.getElementById(`${key}-value`);
+        if (valueEl && typeof data[key] === 'number') {
+            valueEl.textContent = data[key].toFixed(2);
+        }
 
-        // Update timestamp di semua kartu
-        if (data.date_str) {
-            const formatted = data.date_str.replace(' ', ' | ');
-            document.querySelectorAll('.timestamp').forEach(el => el.textContent = formatted);
+        if (data[key] === null) {
+            valueEl.textContent = 'N/A';
         }
 
-    } catch (e) {
-        console.error("Gagal fetch data terbaru:", e);
+    });
+
+    // Update timestamp di semua kartu
+    if (data.date_str) {
+        const formatted = data.date_str.replace(' ', ' | ');
+        document.querySelectorAll('.timestamp').forEach(el => el.textContent = formatted);
     }
 }
 
@@ -169,10 +200,27 @@ async function updateLatestData() {
 
 
 
+let windCache = null;
+
 async function renderWindRose(range = "realtime") {
     try {
-        const res = await fetch(`/api/windrose?range=${range}`);
-        const data = await res.json();
+        // Sama seperti history: setelah muatan pertama hanya data setelah cursor yang diambil
+        const cached = windCache && windCache.range === range ? windCache.data : null;
+        const url = cached && cached.cursor
+            ? `/api/windrose?range=${range}&since=${encodeURIComponent(cached.cursor)}`
+            : `/api/windrose?range=${range}`;
+        const res = await fetch(url);
+        let data = await res.json();
+        if (!res.ok) throw new Error(data.error || res.statusText);
+
+        if (cached && cached.cursor) {
+            if (data.resolution !== cached.resolution) {
+                windCache = null;
+                return renderWindRose(range);
+            }
+            data = mergeDelta(cached, data, ['timestamps', 'wspeed', 'wdir']);
+        }
+        windCache = { range, data };
 
         // Buat array dari arah dan kecepatan
         const rawData = [];
@@ -255,19 +303,79 @@ function degToCompass16(deg) {
 
 
 
-async function renderHistoryChart() {
+// History semua parameter dari satu request /api/history/batch; ganti parameter di
+// dropdown cukup menggambar ulang dari cache tanpa request baru
+let historyCache = null;
+
+// Gabungkan respons delta (?since=cursor) ke data yang sudah ada untuk kolom `keys`.
+// Titik lama yang keluar dari jendela (< delta.start) dibuang, begitu juga titik yang
+// dikirim ulang (>= timestamp pertama delta, misalnya bucket rollup yang masih berjalan).
+// Timestamp berformat "YYYY-MM-DD HH:MM:SS" sehingga bisa dibandingkan sebagai string.
+function mergeDelta(old, delta, keys) {
+    const first = delta.timestamps[0];
+    const keep = [];
+    old.timestamps.forEach((ts, i) => {
+        if (ts >= delta.start && (first === undefined || ts < first)) keep.push(i);
+    });
+
+    const merge = (a, b) => {
+        if (Array.isArray(a) || Array.isArray(b)) {
+            return keep.map(i => (a || [])[i] ?? null)
+                .concat(b || delta.timestamps.map(() => null));
+        }
+        const out = {};
+        new Set([...Object.keys(a || {}), ...Object.keys(b || {})])
+            .forEach(k => { out[k] = merge((a || {})[k], (b || {})[k]); });
+        return out;
+    };
+
+    const merged = { ...delta, step_minutes: Math.max(old.step_minutes || 0, delta.step_minutes || 0) };
+    keys.forEach(k => { merged[k] = merge(old[k], delta[k]); });
+    return merged;
+}
+
+async function loadHistory(range) {
+    // Satu titik per piksel lebar grafik: payload dan waktu render tetap berapa pun rentangnya
+    const chartWidth = document.getElementById('dataChart')?.clientWidth || 800;
+    const maxPoints = Math.max(200, Math.round(chartWidth));
+    const params = encodeURIComponent(config.parameters.join(','));
+    const url = `/api/history/batch?params=${params}&range=${range}&max_points=${maxPoints}`;
+
+    // Refresh berikutnya hanya mengambil data setelah cursor; muat ulang penuh jika rentang
+    // berganti atau titik yang ditambahkan sudah jauh melebihi max_points
+    const cached = historyCache && historyCache.range === range ? historyCache.data : null;
+    const incremental = cached && cached.cursor && cached.timestamps.length < 2 * maxPoints;
+
+    const res = await fetch(incremental ? `${url}&since=${encodeURIComponent(cached.cursor)}` : url);
+    let data = await res.json();
+    if (!res.ok) throw new Error(data.error || res.statusText);
+
+    if (incremental) {
+        if (data.resolution !== cached.resolution) {
+            historyCache = null;
+            return loadHistory(range);
+        }
+        data = mergeDelta(cached, data, ['timestamps', 'series']);
+    }
+    historyCache = { range, data };
+    return data;
+}
+
+async function renderHistoryChart(refresh = true) {
     const param = document.getElementById('param-select').value;
     const range = document.getElementById('time-range').value;
 
     try {
-        const res = await fetch(`/api/history?param=${param}&range=${range}`);
-        const data = await res.json();
+        const data = (!refresh && historyCache && historyCache.range === range)
+            ? historyCache.data
+            : await loadHistory(range);
 
         const timestamps = data.timestamps;
-        const values = data.values;
+        const values = (data.series[param] || {}).values || [];
 
         // Konversi ke array baru dengan null untuk gap > 6 menit
-        const gapThreshold = config.gapweb; // dalam menit
+        // Data rollup (per jam/hari) berjarak step_minutes, gap dihitung dari lebar bucket
+        const gapThreshold = Math.max(config.gapweb, 2 * (data.step_minutes || 0)); // dalam menit
         const processedX = [];
         const processedY = [];
 
@@ -322,7 +430,7 @@ async function renderHistoryChart() {
 async function updateAllData() {
     await updateLatestData();
     await renderHistoryChart();
-    await renderWindRose();
+    await renderWindRose(document.getElementById('time-range').value);
 }
 
 // --- Event Listeners ---
@@ -382,15 +490,12 @@ document.getElementById('export-btn').addEventListener('click', async () => {
 
 // Event listener
 document.getElementById('param-select').addEventListener('change', () => {
-    const param = document.getElementById('param-select').value;
-    const range = document.getElementById('time-range').value;
-    renderHistoryChart(param, range);
+    renderHistoryChart(false); // data semua parameter sudah ada di cache
 });
 
 document.getElementById('time-range').addEventListener('change', () => {
-    const param = document.getElementById('param-select').value;
     const range = document.getElementById('time-range').value;
-    renderHistoryChart(param, range);
+    renderHistoryChart();
     renderWindRose(range);
 });
 
@@ -437,15 +542,6 @@ setInterval(() => {
    loadUsbOptions();
 }, 10000);
 
-// Auto refresh tiap 1 menit
-setInterval(() => {
-    const param = document.getElementById('param-select').value;
-    const range = document.getElementById('time-range').value;
-    //fetchHistory(param, range);
-    renderHistoryChart(param, range);
-    renderWindRose(range);
-}, 30000);
-
 
 //wifi deteksi
 
@@ -475,6 +571,45 @@ updateWifiStatusUI();
 setInterval(updateWifiStatusUI, 30000);
 
 
+// Status kesehatan sensor (circuit breaker)
+function updateDeviceHealthUI() {
+  fetch('/api/device-health')
+    .then(res => res.json())
+    .then(data => {
+      const container = document.getElementById("footer-health");
+      const devices = data.devices || {};
+      const names = Object.keys(devices);
+
+      if (names.length === 0) {
+        container.textContent = "Sensor: -";
+        return;
+      }
+
+      container.innerHTML = '';
+      names.forEach(name => {
+        const info = devices[name];
+        const badge = document.createElement('span');
+        badge.className = 'health-badge';
+        badge.title = info.state === 'open'
+          ? `Tidak merespons (${info.failures}x gagal), dicoba lagi dalam ${info.retry_in} detik`
+          : `Terakhir berhasil: ${info.last_success || '-'}`;
+
+        const dot = document.createElement('span');
+        dot.className = `health-dot ${info.state}`;
+        badge.appendChild(dot);
+        badge.appendChild(document.createTextNode(name.toUpperCase()));
+        container.appendChild(badge);
+      });
+    })
+    .catch(err => {
+      document.getElementById("footer-health").textContent = "Sensor: -";
+    });
+}
+
+updateDeviceHealthUI();
+setInterval(updateDeviceHealthUI, 30000);
+
+
 // Fungsi untuk load SSID saat modal dibuka
 const ssidSelect = document.getElementById("ssid");
 
@@ -4,11 +4,16 @@ import json
 import pytz
 import jwt  # Pastikan ini adalah PyJWT
 import requests
+import sys
 import mysql.connector
 from datetime import datetime
 from collections import defaultdict
 from dotenv import load_dotenv
 
+# Koneksi status pengiriman (MySQL atau PostgreSQL sesuai STORAGE_BACKEND) ada di backend/delivery.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../backend"))
+from delivery import connection, column, require_backend
+
 # Load environment variables
 env_path = "/opt/logger/config/env"
 if not load_dotenv(dotenv_path=env_path):
@@ -16,15 +21,10 @@ if not load_dotenv(dotenv_path=env_path):
     exit(1)
 
 # Config from env
-FIELDS = os.getenv("KLHK_FIELDS")
+FIELDS = [f.strip() for f in os.getenv("KLHK_FIELDS", "").split(",") if f.strip()]
 STATUS = os.getenv("KLHK_STATUS")
 # Variabel konfigurasi dari env
 TARGET_MINUTE = int(os.getenv('KLHK_TARGET_MINUTE'))
-HOST = os.getenv('DB_HOST')
-USER = os.getenv('DB_USER')
-PASSWORD = os.getenv('DB_PASSWORD')
-DATABASE = os.getenv('DB_NAME')
-PORT = int(os.getenv('DB_PORT'))
 TIMEZONE = os.getenv('TIMEZONE', 'Asia/Jakarta')
 API_ENDPOINT = os.getenv('KLHK_API_URL')
 API_JWT = os.getenv('KLHK_TOKEN_URL')
@@ -34,14 +34,6 @@ MAX_DUP_RETRY = int(os.getenv('KLHK_MAX_DUP_RETRY', 3))
 tz = pytz.timezone(TIMEZONE)
 duplicate_attempt = 0
 
-MYSQL_CONFIG = {
-    'host': HOST,
-    'user': USER,
-    'password': PASSWORD,
-    'database': DATABASE,
-    'port': PORT
-}
-
 def write_log(message):
     timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}")
@@ -65,10 +57,10 @@ def ambil_data():
     grouped_data = defaultdict(list)
 
     try:
-        with mysql.connector.connect(**MYSQL_CONFIG) as conn:
+        with connection() as conn:
             with conn.cursor() as cursor:
-                query_fields = ", ".join(["date"] + FIELDS)
-                cursor.execute(f"SELECT {query_fields} FROM tmp WHERE status='retry' AND date < %s", [now])
+                query_fields = ", ".join(column(f) for f in ["date"] + FIELDS)
+                cursor.execute(f"SELECT {query_fields} FROM data WHERE status='retry' AND date < %s", [now])
                 rows = cursor.fetchall()
 
                 if not rows:
@@ -124,13 +116,11 @@ def send_data_to_api(data, start, end):
         response = requests.post(API_ENDPOINT, json={"token": encoded}, headers=headers)
         result = response.json()
 
-        with mysql.connector.connect(**MYSQL_CONFIG) as conn:
+        with connection() as conn:
             with conn.cursor() as cursor:
                 if result.get("status"):
                     now = datetime.now(tz)
-                    cursor.execute("UPDATE tmp SET dateterkirim=%s, status='terkirim', keterangan='sukses' WHERE date >=%s AND date <=%s", [now, start, end])
-                    cursor.execute("INSERT INTO data SELECT * FROM tmp WHERE date >=%s AND date <=%s", [start, end])
-                    cursor.execute("DELETE FROM tmp WHERE date >=%s AND date <=%s", [start, end])
+                    cursor.execute("UPDATE data SET dateterkirim=%s, status='terkirim', keterangan='sukses' WHERE status='retry' AND date >=%s AND date <=%s", [now, start, end])
                     conn.commit()
                     write_log("✅ Data berhasil dikirim & diproses.")
                 else:
@@ -139,26 +129,27 @@ def send_data_to_api(data, start, end):
                     if "duplikasi" in desc.lower():
                         duplicate_attempt += 1
                         if duplicate_attempt >= MAX_DUP_RETRY:
-                            cursor.execute("UPDATE tmp SET status='Duplikasi', keterangan='Manual check' WHERE date >=%s AND date <=%s", [start, end])
+                            cursor.execute("UPDATE data SET status='Duplikasi', keterangan='Manual check' WHERE status='retry' AND date >=%s AND date <=%s", [start, end])
                             conn.commit()
                             write_log("⚠️ Duplikasi berulang. Pengiriman dihentikan.")
                             return
 
+                        # Data duplikat tetap disimpan lokal, hanya ditandai agar tidak dikirim lagi
                         for ts in result.get("data", []):
-                            cursor.execute("DELETE FROM tmp WHERE date = %s", [ts])
-                            write_log(f"🗑️ Hapus duplikat: {ts}")
+                            cursor.execute("UPDATE data SET status='Duplikasi', keterangan='Duplikat di server' WHERE status='retry' AND date = %s", [ts])
+                            write_log(f"🏷️ Tandai duplikat: {ts}")
                         conn.commit()
 
                         # Re-fetch & resend
-                        cursor.execute(f"SELECT {', '.join(FIELDS)} FROM tmp WHERE date >=%s AND date <=%s", [start, end])
+                        cursor.execute(f"SELECT {', '.join(column(f) for f in FIELDS)} FROM data WHERE status='retry' AND date >=%s AND date <=%s", [start, end])
                         rows = cursor.fetchall()
                         if rows:
                             data_cleaned = [dict(zip(FIELDS, row)) for row in rows]
                             send_data_to_api(data_cleaned, start, end)
                         else:
-                            write_log("ℹ️ Tidak ada data tersisa setelah hapus duplikat.")
+                            write_log("ℹ️ Tidak ada data tersisa setelah duplikat ditandai.")
                     else:
-                        cursor.execute("UPDATE tmp SET status='retry', keterangan=%s WHERE date >=%s AND date <=%s", [desc, start, end])
+                        cursor.execute("UPDATE data SET status='retry', keterangan=%s WHERE status='retry' AND date >=%s AND date <=%s", [desc, start, end])
                         conn.commit()
 
     except Exception as e:
@@ -186,5 +177,6 @@ def scheduler():
         write_log("🛑 Service dihentikan manual.")
 
 if __name__ == "__main__":
+    require_backend("KLHK Retry")
     scheduler()
     # ambil_data()  # Uncomment jika ingin satu kali jalan
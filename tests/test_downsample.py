@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import downsample  # noqa: E402
+
+
+def series(n, params):
+    t = pd.date_range("2025-01-01", periods=n, freq="min").values
+    rng = np.random.default_rng(1)
+    columns = [(np.sin(np.arange(n) / (50 + 10 * i)) * (i + 1) + rng.random(n)).tolist() for i in range(params)]
+    return t, columns
+
+
+@pytest.mark.parametrize("method", downsample.METHODS)
+@pytest.mark.parametrize("params", [1, 2, 3, 8])
+def test_multi_param_respects_max_points(method, params):
+    t, columns = series(5000, params)
+    keep = downsample.downsample(t, columns, 100, method)
+    assert len(keep) <= 100
+    assert np.all(np.diff(keep) > 0)
+
+
+@pytest.mark.parametrize("method", downsample.METHODS)
+def test_peak_of_each_param_is_kept(method):
+    t, columns = series(5000, 2)
+    columns[0][1234] = 100.0
+    columns[1][4321] = -100.0
+    keep = downsample.downsample(t, columns, 200, method)
+    assert 1234 in keep and 4321 in keep
+
+
+def test_rows_empty_in_all_columns_are_skipped():
+    t, _ = series(5, 1)
+    keep = downsample.downsample(t, [[1, None, 3, 4, 5], [None, None, 1, 1, 1]], 10)
+    assert keep.tolist() == [0, 2, 3, 4]